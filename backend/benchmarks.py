@@ -0,0 +1,483 @@
+import inspect
+import logging
+import os
+import pickle
+import resource
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from cache_keys import canonicalize_value, get_cache_key, get_legacy_cache_key
+from cache_store import CacheEntry, CacheStore
+from fuzzy_match import FuzzyMatcher
+from prediction_rules import DEFAULT_PREDICTION_FORMATS, PredictionRuleRegistry, normalize_prediction_values
+from report_parser import parse_reports
+
+
+def time_call(func, *args, **kwargs):
+    """
+    Run func once and return (result, elapsed seconds)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def print_result(name: str, operations: int, elapsed: float):
+    rate = operations / elapsed if elapsed else float('inf')
+    print(f"  {name:<40} {elapsed:8.3f}s  {rate:12,.0f} ops/s  {elapsed / operations * 1e6:8.2f} us/op")
+
+
+def benchmark_cache_formats(num_entries: int = 20000, num_lookups: int = 50000):
+    """
+    Compare the legacy one-pickle-per-key cache against the SQLite cache store
+
+    Lookups against the store bypass the memory tier so both paths hit disk.
+    """
+    print(f"\nCache lookups: {num_entries} entries, {num_lookups} random lookups")
+    now = datetime.now()
+    entries = []
+    for i in range(num_entries):
+        entry = CacheEntry(f"value {i}", random.random(), now - timedelta(minutes=i),
+                           column_name='occupation', original_value=f"raw value {i}")
+        entry.approved_by = random.choice(['auto_approved', 'user_approved', None])
+        entries.append((f"{i:032x}", entry))
+    lookup_keys = [random.choice(entries)[0] for _ in range(num_lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_dir = Path(tmp_dir) / 'pickle'
+        pickle_dir.mkdir()
+
+        def write_pickles():
+            for cache_key, entry in entries:
+                with open(pickle_dir / f"{cache_key}.pkl", 'wb') as f:
+                    pickle.dump(entry.to_dict(), f)
+
+        def read_pickles():
+            for cache_key in lookup_keys:
+                cache_file = pickle_dir / f"{cache_key}.pkl"
+                if cache_file.exists():
+                    with open(cache_file, 'rb') as f:
+                        CacheEntry.from_dict(pickle.load(f))
+
+        store = CacheStore(Path(tmp_dir) / 'cache.db')
+
+        def read_store():
+            for cache_key in lookup_keys:
+                store.get(cache_key)
+
+        _, elapsed = time_call(write_pickles)
+        print_result('pickle files: write', num_entries, elapsed)
+        _, elapsed = time_call(store.put_many, entries)
+        print_result('cache store: write (one transaction)', num_entries, elapsed)
+        _, elapsed = time_call(read_pickles)
+        print_result('pickle files: lookup', num_lookups, elapsed)
+        _, elapsed = time_call(read_store)
+        print_result('cache store: lookup (mmap)', num_lookups, elapsed)
+
+        pickle_bytes = sum(f.stat().st_size for f in pickle_dir.glob('*.pkl'))
+        # Rows still in the WAL are not in the database file until a checkpoint
+        store.checkpoint()
+        wal_path = store.path.with_name(store.path.name + '-wal')
+        store_bytes = os.path.getsize(store.path) + (os.path.getsize(wal_path) if wal_path.exists() else 0)
+        store.close()
+        print(f"  Size on disk: pickle files {pickle_bytes:,} bytes in {num_entries} files, "
+              f"cache store {store_bytes:,} bytes")
+
+
+# Variants seen in analysis files, used when no cache export is given
+SAMPLE_KEY_CORPUS = [
+    ('location', 'Washington DC'), ('location', 'washington dc'), ('location', 'Washington, D.C.'),
+    ('location', 'Washington  DC'), ('location', 'washington d.c.'), ('location', 'WASHINGTON DC'),
+    ('location', 'New York City'), ('location', 'NYC'), ('location', 'new york city'),
+    ('location', 'San Francisco'), ('location', 'SF'), ('location', 'san francisco, '),
+    ('location', 'St. Louis'), ('location', 'Saint Louis'), ('location', 'st louis'),
+    ('occupation', 'Software Engineer'), ('occupation', 'software engineer'), ('occupation', 'SWE'),
+    ('occupation', 'Sr. Consultant'), ('occupation', 'senior consultant'), ('occupation', 'Senior  Consultant'),
+    ('occupation', 'consultant'), ('occupation', 'Consultant.'), ('occupation', 'RN'),
+    ('occupation', 'Registered Nurse'), ('occupation', 'Project Mgr'), ('occupation', 'project manager'),
+    ('gender', 'male'), ('gender', 'Male'), ('gender', 'M'), ('gender', 'female'), ('gender', 'F'),
+    ('gender', 'Non-binary'), ('gender', 'nonbinary'), ('gender', 'non binary'),
+]
+
+
+def benchmark_cache_key_hit_rate(corpus_csv: str = None):
+    """
+    Compare cache hit rates of the legacy and canonical cache keys over a corpus
+
+    The corpus is the (column_name, original_value) pairs of a cache export
+    CSV when one is given, otherwise SAMPLE_KEY_CORPUS. Each pair is looked up
+    in order against an initially empty cache, so every distinct key costs one
+    GPT call and every repeat is a hit.
+    """
+    if corpus_csv:
+        df = pd.read_csv(corpus_csv, usecols=['column_name', 'original_value']).dropna()
+        corpus = list(zip(df['column_name'], df['original_value'].astype(str)))
+        print(f"\nCache key hit rate: {len(corpus)} values from {corpus_csv}")
+    else:
+        corpus = SAMPLE_KEY_CORPUS
+        print(f"\nCache key hit rate: {len(corpus)} built-in sample values")
+
+    for name, key_func in [('legacy lower().strip()', get_legacy_cache_key), ('canonical', get_cache_key)]:
+        keys, elapsed = time_call(lambda: [key_func(value, column) for column, value in corpus])
+        distinct = len(set(keys))
+        hit_rate = (len(keys) - distinct) / len(keys) if keys else 0
+        print(f"  {name:<24} {distinct:8} distinct keys  hit rate {hit_rate:7.2%}  "
+              f"({elapsed / max(len(keys), 1) * 1e6:.2f} us/key)")
+
+    if not corpus_csv:
+        print("  Canonical forms:")
+        for column, value in corpus[:6]:
+            print(f"    {column}: {value!r} -> {canonicalize_value(value, column)!r}")
+
+
+def benchmark_local_match(num_values: int = 5000, num_lookups: int = 20000):
+    """
+    Time building the fuzzy-match index and matching inputs against it
+
+    Existing values are synthetic multi-word titles; lookups are those titles
+    with one character dropped, the kind of typo the local matcher resolves.
+    """
+    print(f"\nLocal match: {num_values} existing values, {num_lookups} lookups")
+    words = ['senior', 'junior', 'lead', 'software', 'data', 'civil', 'nurse', 'engineer', 'analyst',
+             'manager', 'consultant', 'teacher', 'designer', 'product', 'sales', 'account', 'research']
+    values = sorted({' '.join(random.sample(words, random.randint(1, 4))).title() for _ in range(num_values)})
+    lookups = []
+    for _ in range(num_lookups):
+        value = random.choice(values)
+        position = random.randrange(len(value))
+        lookups.append(value[:position] + value[position + 1:])
+
+    matcher, elapsed = time_call(FuzzyMatcher, values, 'occupation')
+    print_result(f'build index ({len(values)} distinct values)', len(values), elapsed)
+    matches, elapsed = time_call(lambda: [matcher.match(value, 0.8, 0.1) for value in lookups])
+    print_result('match', num_lookups, elapsed)
+    resolved = sum(1 for match in matches if match)
+    print(f"  Resolved locally: {resolved / num_lookups:.2%}")
+
+
+# Prediction texts in the style of the analysis files, several per category
+SAMPLE_PREDICTIONS = {
+    'employment_type': ['Likely to remain full-time with current employer', 'Shift to part time work',
+                        'Move into freelance consulting', 'Becomes self-employed within 5 years'],
+    'income_bracket': ['$85,000 - $95,000 within 3 years', 'Between 120,000-140,000 annually', 'Unclear'],
+    'education_level': ["Likely to pursue a Master's degree", 'Completes PhD program', 'No further education'],
+    'housing_status': ['Continues renting in the city', 'Buys a house with a mortgage', 'Unknown'],
+    'work_schedule_type': ['Mostly remote with hybrid days', 'Flexible schedule', 'Standard 9-5'],
+}
+
+
+def legacy_validate_confidence_level(confidence: str) -> str:
+    """
+    validate_confidence_level as it was before the rule registry, kept verbatim as a baseline
+
+    Args:
+        confidence (str): Raw confidence level
+
+    Returns:
+        str: Standardized confidence level
+    """
+    # Define valid confidence levels and their variations
+    confidence_levels = {
+        'high': ['high', 'very high', 'very high confidence', 'high confidence', 'strong', 'strong confidence'],
+        'medium': ['medium', 'moderate', 'moderate confidence', 'medium confidence', 'average', 'average confidence'],
+        'low': ['low', 'very low', 'very low confidence', 'low confidence', 'weak', 'weak confidence']
+    }
+
+    # Convert to lowercase and strip whitespace
+    confidence = confidence.lower().strip()
+
+    # Check for numeric confidence scores (0-1 range)
+    try:
+        score = float(confidence)
+        if 0 <= score <= 1:
+            if score >= 0.8:
+                return 'High'
+            elif score >= 0.5:
+                return 'Medium'
+            else:
+                return 'Low'
+    except ValueError:
+        pass
+
+    # Check against known variations
+    for standard_level, variations in confidence_levels.items():
+        if confidence in variations:
+            return standard_level.capitalize()
+
+    # If no match found, return Medium as default
+    logging.warning(f"Invalid confidence level '{confidence}' - defaulting to Medium")
+    return 'Medium'
+
+
+def legacy_normalize_prediction_values(predictions):
+    """
+    normalize_prediction_values as it was before the rule registry, kept verbatim as a baseline:
+    the pattern table is rebuilt on every call and each pattern runs through an uncompiled re.search
+
+    Args:
+        predictions (dict): Raw predictions from the LLM
+
+    Returns:
+        dict: Normalized predictions with consistent formatting
+    """
+    normalized = {}
+
+    # Define standard formats for each category
+    standard_formats = {
+        "employment_type": {
+            "patterns": {
+                r"full[-\s]?time": "Full-time",
+                r"part[-\s]?time": "Part-time",
+                r"contract": "Contract",
+                r"freelance": "Freelance",
+                r"self[-\s]?employed": "Self-employed"
+            },
+            "default": "Full-time"
+        },
+        "income_bracket": {
+            "patterns": {
+                r"\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)": lambda m: f"${m.group(1)} - ${m.group(2)}",
+                r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)": lambda m: f"${m.group(1)} - ${m.group(2)}"
+            },
+            "default": "Not specified"
+        },
+        "education_level": {
+            "patterns": {
+                r"bachelor['']?s": "Bachelor's degree",
+                r"master['']?s": "Master's degree",
+                r"ph\.?d": "PhD",
+                r"associate['']?s": "Associate's degree",
+                r"high school": "High school diploma"
+            },
+            "default": "Not specified"
+        },
+        "housing_status": {
+            "patterns": {
+                r"rent(?:ing|ed)?": "Renting",
+                r"own(?:ing|ed)?": "Owning",
+                r"mortgage": "Mortgage",
+                r"apartment": "Apartment",
+                r"house": "House"
+            },
+            "default": "Not specified"
+        },
+        "work_schedule_type": {
+            "patterns": {
+                r"9[-\s]?5": "9-5",
+                r"flexible": "Flexible",
+                r"shift": "Shift work",
+                r"remote": "Remote",
+                r"hybrid": "Hybrid"
+            },
+            "default": "Not specified"
+        }
+    }
+
+    import re
+
+    for category, data in predictions.items():
+        normalized[category] = data.copy()
+
+        # Get the prediction value
+        prediction = data.get('prediction', '')
+
+        # Check if we have a standard format for this category
+        if category in standard_formats:
+            format_rules = standard_formats[category]
+
+            # Try to match against known patterns
+            matched = False
+            for pattern, replacement in format_rules['patterns'].items():
+                if isinstance(replacement, str):
+                    if re.search(pattern, prediction, re.IGNORECASE):
+                        normalized[category]['prediction'] = replacement
+                        matched = True
+                        break
+                else:
+                    # Handle lambda functions for complex replacements
+                    match = re.search(pattern, prediction)
+                    if match:
+                        normalized[category]['prediction'] = replacement(match)
+                        matched = True
+                        break
+
+            # If no match found, use default
+            if not matched:
+                normalized[category]['prediction'] = format_rules['default']
+
+        # Normalize confidence levels
+        if 'confidence' in data:
+            normalized[category]['confidence'] = legacy_validate_confidence_level(data['confidence'])
+        else:
+            normalized[category]['confidence'] = 'Medium'  # Default confidence level
+
+        # Normalize sources to include year
+        if 'sources' in data:
+            sources = []
+            for source in data['sources']:
+                if not re.search(r'\d{4}', source):
+                    source = f"{source} (2024)"
+                sources.append(source)
+            normalized[category]['sources'] = sources
+
+    return normalized
+
+
+def benchmark_prediction_rules(num_records: int = 20000):
+    """
+    Compare the previous normalize_prediction_values with the current one on the same records
+
+    Each record holds every sample category with a confidence and sources, so
+    both sides do the full per-record work, not only the pattern matching.
+    """
+    confidences = ['High', 'medium', 'Low confidence', '0.85', '0.4', 'strong']
+    records = [
+        {
+            category: {
+                'prediction': random.choice(texts),
+                'confidence': random.choice(confidences),
+                'sources': ['Census Bureau', 'Pew Research 2023'],
+            }
+            for category, texts in SAMPLE_PREDICTIONS.items()
+        }
+        for _ in range(num_records)
+    ]
+    rows = num_records * len(SAMPLE_PREDICTIONS)
+    print(f"\nPrediction rules: {num_records} records, {rows} predictions")
+
+    registry, elapsed = time_call(PredictionRuleRegistry, DEFAULT_PREDICTION_FORMATS)
+    print_result('compile registry', len(registry.categories), elapsed)
+    legacy, legacy_elapsed = time_call(lambda: [legacy_normalize_prediction_values(record) for record in records])
+    print_result('previous implementation', rows, legacy_elapsed)
+    current, elapsed = time_call(lambda: [normalize_prediction_values(record, registry) for record in records])
+    print_result('rule registry', rows, elapsed)
+    print(f"  Speedup: {legacy_elapsed / elapsed:.2f}x  Identical results: {legacy == current}")
+
+
+SAMPLE_REPORT = """INPUT DATA
+==============================
+age: 28
+occupation: consultant
+location: washington dc
+zip_code: 20001
+gender: male
+
+DEMOGRAPHIC ANALYSIS RESULTS
+==============================
+
+## Location
+Prediction: 70% probability of moving to a different neighborhood within DC within 3 years
+Explanation: Young professionals in DC have high mobility rates
+Sources:
+- DC Office of Planning Demographic Report (2024)
+- Urban Institute Housing Mobility Study
+
+## Employment Type
+Prediction: Likely to remain full-time with current employer
+Explanation: Consultants in DC have an average tenure of 2.3 years per employer
+Sources:
+- Bureau of Labor Statistics Professional Services Report (2024)
+
+## Income Bracket
+Prediction: $125,000 - $145,000 within 3 years
+Explanation: DC-based consultants command premium salaries
+Sources:
+- Robert Half Salary Guide
+
+"""
+
+_SIZE_UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(size: str) -> int:
+    size = size.strip().upper()
+    for unit, factor in _SIZE_UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def benchmark_report_parser(sizes: str = '1KB,1MB,10MB,100MB,1GB'):
+    """
+    Stream files of concatenated reports of each size through the parser
+
+    Each file repeats SAMPLE_REPORT (about 1 KB) until it reaches at least the size.
+    Records are parsed and their predictions normalized, as
+    iter_demographic_records does, one at a time. Peak memory is the process's
+    maximum resident size after the run; it stays flat as files grow because
+    only one report is held at a time. Sizes are comma-separated, e.g.
+    report_parser:1KB,100MB.
+    """
+    print(f"\nReport parser: files of {sizes}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes.split(','):
+            target = parse_size(size)
+            path = Path(tmp_dir) / 'reports.txt'
+            with open(path, 'w') as f:
+                block = SAMPLE_REPORT * 1024
+                written = 0
+                while written + len(block) <= target:
+                    f.write(block)
+                    written += len(block)
+                while written < target:
+                    f.write(SAMPLE_REPORT)
+                    written += len(SAMPLE_REPORT)
+            file_bytes = os.path.getsize(path)
+
+            def stream():
+                count = 0
+                with open(path) as f:
+                    for record in parse_reports(f):
+                        normalize_prediction_values(record['predictions'])
+                        count += 1
+                return count
+
+            records, elapsed = time_call(stream)
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"  {size.strip():>6} ({file_bytes:,} bytes)  {records:>10,} records  {elapsed:8.3f}s  "
+                  f"{file_bytes / elapsed / 1024 ** 2:8.1f} MB/s  {records / elapsed:10,.0f} records/s  "
+                  f"peak RSS {peak_mb:,.0f} MB")
+            path.unlink()
+
+
+BENCHMARKS = {
+    'cache': benchmark_cache_formats,
+    'cache_keys': benchmark_cache_key_hit_rate,
+    'local_match': benchmark_local_match,
+    'prediction_rules': benchmark_prediction_rules,
+    'report_parser': benchmark_report_parser,
+}
+
+
+def main():
+    """
+    Run the benchmarks named on the command line, or all of them
+
+    A benchmark name may be followed by an argument after a colon, converted
+    to the type of the benchmark's first parameter, e.g. cache:5000 or
+    cache_keys:backend/cache_export.csv
+    """
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        name, _, argument = name.partition(':')
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            continue
+        if argument:
+            parameter = next(iter(inspect.signature(BENCHMARKS[name]).parameters.values()))
+            if parameter.annotation in (int, float):
+                argument = parameter.annotation(argument)
+            BENCHMARKS[name](argument)
+        else:
+            BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
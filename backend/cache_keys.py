@@ -0,0 +1,99 @@
+import hashlib
+import re
+import unicodedata
+from typing import Optional
+
+# Bump whenever canonicalize_value changes so existing entries can be re-keyed
+CACHE_KEY_VERSION = 3
+
+# Token-level expansions applied after punctuation is stripped
+COLUMN_ABBREVIATIONS = {
+    'location': {
+        'nyc': 'new york city',
+        'sf': 'san francisco',
+        'st': 'saint',
+        'ft': 'fort',
+        'mt': 'mount',
+        'wash': 'washington',
+    },
+    'occupation': {
+        'sr': 'senior',
+        'jr': 'junior',
+        'mgr': 'manager',
+        'eng': 'engineer',
+        'engr': 'engineer',
+        'dev': 'developer',
+        'swe': 'software engineer',
+        'rn': 'registered nurse',
+        'vp': 'vice president',
+        'asst': 'assistant',
+        'admin': 'administrator',
+        'acct': 'accountant',
+    },
+    'gender': {
+        'm': 'male',
+        'f': 'female',
+        'man': 'male',
+        'woman': 'female',
+        'nb': 'non binary',
+        'nonbinary': 'non binary',
+        'enby': 'non binary',
+    },
+}
+
+# Abbreviations left as they are when they end the value, where they mean something else ("Main St")
+NON_TRAILING_ABBREVIATIONS = {
+    'location': {'st'},
+}
+
+# Dots and apostrophes join their neighbours ("D.C." -> "dc"), other punctuation separates words,
+# except "+" and "#" ending a word, which tell "C++" and "C#" apart from "C"
+_JOINING_PUNCTUATION = re.compile(r"[.'’]")
+_SEPARATING_PUNCTUATION = re.compile(r"(?<![\w+#])[+#]|[^\w\s+#]|_")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize_value(input_value: str, column_name: Optional[str] = None) -> str:
+    """
+    Reduce a raw value to the canonical form used for cache keys
+
+    Applies Unicode NFKC, casefolding, punctuation stripping, whitespace
+    collapsing and the column's abbreviation expansions, so that
+    "Washington, D.C." and "washington  dc" share a key.
+
+    Args:
+        input_value (str): Raw value to canonicalize
+        column_name (str): Column the value belongs to, selects abbreviation expansions
+
+    Returns:
+        str: Canonical value
+    """
+    value = unicodedata.normalize('NFKC', str(input_value)).casefold()
+    value = _JOINING_PUNCTUATION.sub('', value)
+    value = _SEPARATING_PUNCTUATION.sub(' ', value)
+    tokens = value.split()
+    abbreviations = COLUMN_ABBREVIATIONS.get(column_name, {})
+    if abbreviations:
+        non_trailing = NON_TRAILING_ABBREVIATIONS.get(column_name, ())
+        last = len(tokens) - 1
+        tokens = [
+            token if i == last and token in non_trailing else abbreviations.get(token, token)
+            for i, token in enumerate(tokens)
+        ]
+    return _WHITESPACE.sub(' ', ' '.join(tokens)).strip()
+
+
+def get_legacy_cache_key(input_value: str, column_name: str) -> str:
+    """
+    Cache key used before canonicalization was versioned (version 1)
+    """
+    key = f"{column_name}:{input_value.lower().strip()}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def get_cache_key(input_value: str, column_name: str) -> str:
+    """
+    Generate a cache key for a normalization request from the canonical value
+    """
+    key = f"v{CACHE_KEY_VERSION}:{column_name}:{canonicalize_value(input_value, column_name)}"
+    return hashlib.md5(key.encode()).hexdigest()
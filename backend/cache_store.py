@@ -0,0 +1,904 @@
+import logging
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Sentinel for query filters where None is a meaningful value
+ANY = object()
+
+
+def to_epoch(value: datetime) -> float:
+    """
+    Convert a naive datetime to epoch seconds without applying the local UTC offset
+    """
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def from_epoch(value: float) -> datetime:
+    """
+    Inverse of to_epoch
+    """
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+class CacheEntry:
+    def __init__(self, normalized_value: str, confidence_score: float, timestamp: datetime,
+                 column_name: Optional[str] = None, original_value: Optional[str] = None,
+                 fingerprint: Optional[str] = None):
+        self.normalized_value = normalized_value
+        self.confidence_score = confidence_score
+        self.timestamp = timestamp
+        self.column_name = column_name
+        self.original_value = original_value
+        self.fingerprint = fingerprint
+        self.approved_by = None
+        self.review_count = 0
+        self.last_reviewed = None
+
+    def to_dict(self) -> dict:
+        return {
+            'column_name': self.column_name,
+            'original_value': self.original_value,
+            'fingerprint': self.fingerprint,
+            'normalized_value': self.normalized_value,
+            'confidence_score': self.confidence_score,
+            'timestamp': self.timestamp.isoformat(),
+            'approved_by': self.approved_by,
+            'review_count': self.review_count,
+            'last_reviewed': self.last_reviewed.isoformat() if self.last_reviewed else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CacheEntry':
+        entry = cls(
+            normalized_value=data['normalized_value'],
+            confidence_score=data['confidence_score'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            column_name=data.get('column_name'),
+            original_value=data.get('original_value'),
+            fingerprint=data.get('fingerprint')
+        )
+        entry.approved_by = data.get('approved_by')
+        entry.review_count = data.get('review_count', 0)
+        if data.get('last_reviewed'):
+            entry.last_reviewed = datetime.fromisoformat(data['last_reviewed'])
+        return entry
+
+
+class NegativeCacheEntry:
+    """
+    Record of repeated normalization failures for one cache key
+    """
+
+    def __init__(self, failure_count: int, last_failure: datetime, retry_after: datetime,
+                 last_error: Optional[str] = None):
+        self.failure_count = failure_count
+        self.last_failure = last_failure
+        self.retry_after = retry_after
+        self.last_error = last_error
+
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        """
+        True while retries for this key should still be suppressed
+        """
+        return (now or datetime.now()) < self.retry_after
+
+
+class MemoryCacheTier:
+    """
+    Bounded in-process LRU of cache entries with a TTL taken from each entry's timestamp
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[timedelta] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        return self.ttl is not None and entry.timestamp <= datetime.now() - self.ttl
+
+    def get(self, cache_key: str) -> Optional[CacheEntry]:
+        """
+        Look up an entry, refreshing its LRU position on a hit
+        """
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached is None:
+                self.misses += 1
+                return None
+            if self._is_expired(cached):
+                del self._entries[cache_key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return cached
+
+    def put(self, cache_key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, cache_key: str):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def invalidate_older_than(self, expiry_date: datetime):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.timestamp < expiry_date]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0
+            }
+
+
+class CacheStore:
+    """
+    Normalization cache kept in a single SQLite file instead of one pickle per key
+    """
+
+    SCHEMA_VERSION = 3
+
+    # Records use a fixed schema: epoch REAL timestamps and approval statuses
+    # interned as small integer codes in approval_statuses
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS approval_statuses (
+            code INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            cache_key TEXT PRIMARY KEY,
+            column_name TEXT,
+            original_value TEXT,
+            normalized_value TEXT NOT NULL,
+            confidence_score REAL NOT NULL,
+            timestamp REAL NOT NULL,
+            approved_by INTEGER REFERENCES approval_statuses(code),
+            review_count INTEGER NOT NULL DEFAULT 0,
+            last_reviewed REAL,
+            fingerprint TEXT
+        );
+        CREATE TABLE IF NOT EXISTS negative_entries (
+            cache_key TEXT PRIMARY KEY,
+            column_name TEXT,
+            original_value TEXT,
+            failure_count INTEGER NOT NULL,
+            last_failure REAL NOT NULL,
+            retry_after REAL NOT NULL,
+            last_error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS cache_leases (
+            cache_key TEXT PRIMARY KEY,
+            token TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_column_name ON cache_entries(column_name);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_timestamp ON cache_entries(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_approved_by ON cache_entries(approved_by);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_confidence_score ON cache_entries(confidence_score);
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_fingerprint ON cache_entries(fingerprint);
+    """
+
+    INDEX_NAMES = (
+        'idx_cache_entries_column_name',
+        'idx_cache_entries_timestamp',
+        'idx_cache_entries_approved_by',
+        'idx_cache_entries_confidence_score',
+        'idx_cache_entries_fingerprint'
+    )
+
+    DEFAULT_APPROVAL_STATUSES = ('auto_approved', 'user_approved', 'manual_review', 'bulk_edit', 'rejected')
+
+    COLUMNS = ("cache_key, column_name, original_value, normalized_value, confidence_score, "
+               "timestamp, approved_by, review_count, last_reviewed, fingerprint")
+
+    PAGE_SIZE = 1000
+
+    # Reads are served through a memory-mapped view of the database file up to this size
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    # How long a connection waits for another process's write lock before raising
+    BUSY_TIMEOUT_SECONDS = 30
+
+    def __init__(self, path: Path, memory_tier: Optional[MemoryCacheTier] = None):
+        self.path = Path(path)
+        self.memory_tier = memory_tier
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._status_codes = {}
+        self._status_names = {}
+        self._conn = sqlite3.connect(str(self.path), timeout=self.BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        # Schema creation and upgrades run under the write lock so that workers
+        # opening the same file concurrently upgrade it exactly once
+        self._conn.execute("BEGIN IMMEDIATE")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        legacy_table = self._detach_legacy_table(version)
+        self._execute_script(self.SCHEMA)
+        if version == 2:
+            self._conn.execute("ALTER TABLE cache_entries ADD COLUMN fingerprint TEXT")
+        self._execute_script(self.INDEXES)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO approval_statuses (name) VALUES (?)",
+            [(name,) for name in self.DEFAULT_APPROVAL_STATUSES]
+        )
+        self._load_statuses()
+        if legacy_table:
+            self._migrate_legacy_table(legacy_table)
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _execute_script(self, script: str):
+        """
+        Run semicolon-separated statements inside the current transaction
+
+        Unlike executescript this does not commit first.
+        """
+        for statement in script.split(';'):
+            if statement.strip():
+                self._conn.execute(statement)
+
+    def _detach_legacy_table(self, version: int) -> Optional[str]:
+        """
+        Rename a pre-version-2 cache_entries table (ISO text timestamps) out of the way
+
+        Returns:
+            str: Name of the renamed table, or None if there is nothing to upgrade
+        """
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache_entries'"
+        ).fetchone()
+        if version >= 2 or not exists:
+            return None
+        for index_name in self.INDEX_NAMES:
+            self._conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        self._conn.execute("ALTER TABLE cache_entries RENAME TO cache_entries_legacy")
+        return 'cache_entries_legacy'
+
+    def _migrate_legacy_table(self, table: str):
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        original_value = 'original_value' if 'original_value' in columns else 'NULL'
+        legacy_rows = self._conn.execute(
+            f"SELECT cache_key, column_name, {original_value}, normalized_value, confidence_score, "
+            f"timestamp, approved_by, review_count, last_reviewed FROM {table}"
+        ).fetchall()
+        rows = [
+            (
+                cache_key, column_name, original, normalized_value, confidence_score,
+                to_epoch(datetime.fromisoformat(timestamp)),
+                self._status_code(approved_by),
+                review_count,
+                to_epoch(datetime.fromisoformat(last_reviewed)) if last_reviewed else None,
+                None
+            )
+            for (cache_key, column_name, original, normalized_value, confidence_score,
+                 timestamp, approved_by, review_count, last_reviewed) in legacy_rows
+        ]
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO cache_entries ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self._conn.execute(f"DROP TABLE {table}")
+        logging.info(f"Upgraded {len(rows)} cache entries to schema version {self.SCHEMA_VERSION}")
+
+    def _load_statuses(self):
+        rows = self._conn.execute("SELECT code, name FROM approval_statuses").fetchall()
+        self._status_names = dict(rows)
+        self._status_codes = {name: code for code, name in rows}
+
+    def _status_code(self, name: Optional[str]) -> Optional[int]:
+        """
+        Intern an approval status, adding it to approval_statuses the first time it is seen
+        """
+        if name is None:
+            return None
+        code = self._status_codes.get(name)
+        if code is None:
+            self._conn.execute("INSERT OR IGNORE INTO approval_statuses (name) VALUES (?)", (name,))
+            self._load_statuses()
+            code = self._status_codes[name]
+        return code
+
+    def _status_name(self, code: Optional[int]) -> Optional[str]:
+        if code is None:
+            return None
+        if code not in self._status_names:
+            # Another process may have interned a new status since the table was loaded
+            self._load_statuses()
+        return self._status_names.get(code)
+
+    def _row_to_entry(self, row: tuple) -> Tuple[str, CacheEntry]:
+        (cache_key, column_name, original_value, normalized_value, confidence_score,
+         timestamp, approved_by, review_count, last_reviewed, fingerprint) = row
+        entry = CacheEntry(
+            normalized_value,
+            confidence_score,
+            from_epoch(timestamp),
+            column_name=column_name,
+            original_value=original_value,
+            fingerprint=fingerprint
+        )
+        entry.approved_by = self._status_name(approved_by)
+        entry.review_count = review_count
+        if last_reviewed is not None:
+            entry.last_reviewed = from_epoch(last_reviewed)
+        return cache_key, entry
+
+    def _entry_to_row(self, cache_key: str, entry: CacheEntry) -> tuple:
+        return (
+            cache_key,
+            entry.column_name,
+            entry.original_value,
+            entry.normalized_value,
+            float(entry.confidence_score),
+            to_epoch(entry.timestamp),
+            self._status_code(entry.approved_by),
+            int(entry.review_count),
+            to_epoch(entry.last_reviewed) if entry.last_reviewed else None,
+            entry.fingerprint
+        )
+
+    def get(self, cache_key: str) -> Optional[CacheEntry]:
+        """
+        Look up a single entry by cache key, consulting the memory tier before the database
+        """
+        if self.memory_tier is not None:
+            cached = self.memory_tier.get(cache_key)
+            if cached is not None:
+                return cached
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM cache_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+            _, entry = self._row_to_entry(row)
+        if self.memory_tier is not None:
+            self.memory_tier.put(cache_key, entry)
+        return entry
+
+    def put(self, cache_key: str, entry: CacheEntry):
+        """
+        Insert or replace a single entry
+        """
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO cache_entries ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._entry_to_row(cache_key, entry)
+            )
+            self._conn.commit()
+        if self.memory_tier is not None:
+            self.memory_tier.put(cache_key, entry)
+
+    def put_many(self, items) -> int:
+        """
+        Insert or replace many (cache_key, entry) pairs in one transaction
+
+        Returns:
+            int: Number of entries written
+        """
+        items = list(items)
+        with self._lock:
+            with self._conn:
+                rows = [self._entry_to_row(cache_key, entry) for cache_key, entry in items]
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO cache_entries ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        if self.memory_tier is not None:
+            for cache_key, entry in items:
+                self.memory_tier.put(cache_key, entry)
+        return len(rows)
+
+    def put_rows(self, rows) -> int:
+        """
+        Insert or replace pre-formatted rows (ordered as COLUMNS) in one transaction
+
+        Used by bulk imports, which build rows column-wise and skip CacheEntry objects.
+        Timestamps must already be epoch seconds; approval statuses are given by name.
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._lock:
+            with self._conn:
+                rows = [row[:6] + (self._status_code(row[6]),) + row[7:] for row in rows]
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO cache_entries ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        if self.memory_tier is not None:
+            for row in rows:
+                self.memory_tier.invalidate(row[0])
+        return len(rows)
+
+    def delete(self, cache_key: str) -> bool:
+        """
+        Delete a single entry
+
+        Returns:
+            bool: True if an entry was removed
+        """
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
+            self._conn.commit()
+        if self.memory_tier is not None:
+            self.memory_tier.invalidate(cache_key)
+        return cur.rowcount > 0
+
+    def delete_many(self, cache_keys) -> int:
+        """
+        Delete several entries in one transaction
+
+        Returns:
+            int: Number of entries removed
+        """
+        cache_keys = list(cache_keys)
+        with self._lock:
+            with self._conn:
+                cur = self._conn.executemany(
+                    "DELETE FROM cache_entries WHERE cache_key = ?", [(key,) for key in cache_keys]
+                )
+        if self.memory_tier is not None:
+            for cache_key in cache_keys:
+                self.memory_tier.invalidate(cache_key)
+        return cur.rowcount
+
+    def delete_expired(self, expiry_date: datetime, limit: Optional[int] = None) -> int:
+        """
+        Delete entries older than expiry_date, oldest first, walking the timestamp index
+
+        Args:
+            expiry_date (datetime): Entries with an earlier timestamp are removed
+            limit (int): Maximum number of entries to remove, or None for all of them
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if limit is None:
+                cur = self._conn.execute(
+                    "DELETE FROM cache_entries WHERE timestamp < ?", (to_epoch(expiry_date),)
+                )
+            else:
+                cur = self._conn.execute(
+                    """
+                    DELETE FROM cache_entries WHERE cache_key IN (
+                        SELECT cache_key FROM cache_entries
+                        WHERE timestamp < ?
+                        ORDER BY timestamp
+                        LIMIT ?
+                    )
+                    """,
+                    (to_epoch(expiry_date), limit)
+                )
+            self._conn.commit()
+        if self.memory_tier is not None:
+            self.memory_tier.invalidate_older_than(expiry_date)
+        return cur.rowcount
+
+    def query(self, column_name: Optional[str] = None, min_confidence: Optional[float] = None,
+              max_confidence: Optional[float] = None, approved_by: Optional[str] = None,
+              start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+              fingerprint=ANY) -> Iterator[Tuple[str, CacheEntry]]:
+        """
+        Stream (cache_key, entry) pairs matching every given filter
+
+        Each filter maps onto an indexed column, and rows are fetched in
+        pages of PAGE_SIZE so memory stays bounded regardless of cache size.
+        Pass fingerprint=None to select entries written before fingerprints existed.
+        """
+        conditions = []
+        params = []
+        if column_name is not None:
+            conditions.append("column_name = ?")
+            params.append(column_name)
+        if min_confidence is not None:
+            conditions.append("confidence_score >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            conditions.append("confidence_score <= ?")
+            params.append(max_confidence)
+        if approved_by is not None:
+            with self._lock:
+                if approved_by not in self._status_codes:
+                    self._load_statuses()
+                status_code = self._status_codes.get(approved_by)
+            if status_code is None:
+                return
+            conditions.append("approved_by = ?")
+            params.append(status_code)
+        if fingerprint is None:
+            conditions.append("fingerprint IS NULL")
+        elif fingerprint is not ANY:
+            conditions.append("fingerprint = ?")
+            params.append(fingerprint)
+        if start_date is not None:
+            conditions.append("timestamp >= ?")
+            params.append(to_epoch(start_date))
+        if end_date is not None:
+            conditions.append("timestamp <= ?")
+            params.append(to_epoch(end_date))
+
+        where = " AND ".join(conditions + ["rowid > ?"])
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {self.COLUMNS} FROM cache_entries WHERE {where} ORDER BY rowid LIMIT ?",
+                    params + [last_rowid, self.PAGE_SIZE]
+                ).fetchall()
+                page = [self._row_to_entry(row[1:]) for row in rows]
+            yield from page
+            if len(rows) < self.PAGE_SIZE:
+                return
+            last_rowid = rows[-1][0]
+
+    def iter_entries(self) -> Iterator[Tuple[str, CacheEntry]]:
+        """
+        Stream all entries as (cache_key, entry) pairs
+        """
+        return self.query()
+
+    def get_failure(self, cache_key: str) -> Optional[NegativeCacheEntry]:
+        """
+        Look up the failure record for a cache key
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT failure_count, last_failure, retry_after, last_error FROM negative_entries WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+        if not row:
+            return None
+        failure_count, last_failure, retry_after, last_error = row
+        return NegativeCacheEntry(failure_count, from_epoch(last_failure), from_epoch(retry_after), last_error)
+
+    def record_failure(self, cache_key: str, base_ttl: timedelta, max_ttl: timedelta,
+                       column_name: Optional[str] = None, original_value: Optional[str] = None,
+                       error: Optional[str] = None) -> NegativeCacheEntry:
+        """
+        Count a failure and suppress retries for an exponentially growing period
+
+        The n-th consecutive failure blocks retries for base_ttl * 2**(n-1), capped at max_ttl.
+        """
+        now = datetime.now()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT failure_count FROM negative_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            failure_count = (row[0] if row else 0) + 1
+            backoff = min(base_ttl * (2 ** (failure_count - 1)), max_ttl)
+            retry_after = now + backoff
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO negative_entries
+                    (cache_key, column_name, original_value, failure_count, last_failure, retry_after, last_error)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (cache_key, column_name, original_value, failure_count, to_epoch(now), to_epoch(retry_after), error)
+            )
+            self._conn.commit()
+        return NegativeCacheEntry(failure_count, now, retry_after, error)
+
+    def clear_failure(self, cache_key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM negative_entries WHERE cache_key = ?", (cache_key,))
+            self._conn.commit()
+
+    def delete_expired_failures(self, expiry_date: datetime) -> int:
+        """
+        Forget failure records whose last failure is older than expiry_date
+
+        Returns:
+            int: Number of records removed
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM negative_entries WHERE last_failure < ?", (to_epoch(expiry_date),)
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def acquire_lease(self, cache_key: str, ttl: timedelta) -> Optional[str]:
+        """
+        Claim the right to compute a missing key, across all processes sharing the file
+
+        A lease left behind by a crashed worker stops blocking others once ttl has passed.
+
+        Returns:
+            str: Token to pass to release_lease, or None if another worker holds the lease
+        """
+        token = uuid.uuid4().hex
+        now = datetime.now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM cache_leases WHERE cache_key = ? AND expires_at < ?", (cache_key, to_epoch(now))
+                )
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO cache_leases (cache_key, token, expires_at) VALUES (?, ?, ?)",
+                    (cache_key, token, to_epoch(now + ttl))
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+        return token if cur.rowcount else None
+
+    def release_lease(self, cache_key: str, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_leases WHERE cache_key = ? AND token = ?", (cache_key, token))
+            self._conn.commit()
+
+    def wait_for_lease(self, cache_key: str, timeout: float, poll_interval: float = 0.1) -> bool:
+        """
+        Block until the lease on cache_key is released or has expired
+
+        Returns:
+            bool: False if timeout seconds passed with the lease still held
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                held = self._conn.execute(
+                    "SELECT 1 FROM cache_leases WHERE cache_key = ? AND expires_at >= ?",
+                    (cache_key, to_epoch(datetime.now()))
+                ).fetchone()
+            if not held:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+    def fingerprint_counts(self) -> dict:
+        """
+        Count entries per prompt/model fingerprint (None for unversioned entries)
+        """
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT fingerprint, COUNT(*) FROM cache_entries GROUP BY fingerprint"
+            ).fetchall())
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def checkpoint(self):
+        """
+        Copy the WAL into the database file and truncate it, e.g. before measuring the file's size
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CacheSweeper:
+    """
+    Background thread that removes a bounded number of expired entries per tick
+    """
+
+    def __init__(self, store: CacheStore, expiry: timedelta, interval_seconds: float = 60, batch_size: int = 500):
+        self.store = store
+        self.expiry = expiry
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.total_removed = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sweep_once(self) -> int:
+        """
+        Remove at most batch_size expired entries
+
+        Returns:
+            int: Number of entries removed in this tick
+        """
+        removed = self.store.delete_expired(datetime.now() - self.expiry, limit=self.batch_size)
+        self.total_removed += removed
+        if removed:
+            logging.info(f"Cache sweeper removed {removed} expired entries")
+        return removed
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.sweep_once()
+            except Exception as e:
+                logging.warning(f"Cache sweeper error: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+class CacheRevalidator:
+    """
+    Background worker that refreshes cache entries off the lookup path
+
+    Keys are queued by enqueue() and handed one at a time to the refresh
+    callable on a daemon thread, which is started on first use.
+    """
+
+    def __init__(self, refresh: Callable[[str], None], max_pending: int = 10000):
+        self.refresh = refresh
+        self.max_pending = max_pending
+        self.refreshed = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, cache_key: str) -> bool:
+        """
+        Queue a key for refresh unless it is already pending or the queue is full
+
+        Returns:
+            bool: True if the key was queued
+        """
+        with self._lock:
+            if cache_key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(cache_key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='cache-revalidator', daemon=True)
+                self._thread.start()
+        self._queue.put(cache_key)
+        return True
+
+    def _run(self):
+        while True:
+            cache_key = self._queue.get()
+            if cache_key is None:
+                self._queue.task_done()
+                return
+            try:
+                self.refresh(cache_key)
+                self.refreshed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.warning(f"Error revalidating cache entry {cache_key}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(cache_key)
+                self._queue.task_done()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self):
+        """
+        Block until every queued key has been processed
+        """
+        self._queue.join()
+
+    def stop(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+
+class SingleFlight:
+    """
+    In-process coalescing of concurrent computations of the same key
+
+    The first caller to begin() a key becomes its leader and must finish() or
+    fail() it; callers arriving in the meantime get the leader's future and share
+    its outcome. Complements the cross-process leases of CacheStore, which make
+    other processes wait by polling.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Tuple[Future, bool]:
+        """
+        Returns:
+            tuple: (future for the key's outcome, True if the caller is the leader)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key: str, result: Any):
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_result(result)
+
+    def fail(self, key: str, error: BaseException):
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_exception(error)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def migrate_pickle_cache(store: CacheStore, cache_dir: Path, remove_files: bool = False) -> int:
+    """
+    Import legacy one-pickle-per-key cache files into the cache store
+
+    Args:
+        store (CacheStore): Destination store
+        cache_dir (Path): Directory holding the legacy <md5>.pkl files
+        remove_files (bool): Delete each .pkl file once it has been imported
+
+    Returns:
+        int: Number of entries imported
+    """
+    items = []
+    migrated_files = []
+    for cache_file in Path(cache_dir).glob('*.pkl'):
+        try:
+            with open(cache_file, 'rb') as f:
+                entry = CacheEntry.from_dict(pickle.load(f))
+            items.append((cache_file.stem, entry))
+            migrated_files.append(cache_file)
+        except Exception as e:
+            logging.warning(f"Error migrating cache file {cache_file}: {e}")
+
+    imported_count = store.put_many(items)
+    if remove_files:
+        for cache_file in migrated_files:
+            cache_file.unlink()
+    logging.info(f"Migrated {imported_count} legacy cache files from {cache_dir}")
+    return imported_count
@@ -0,0 +1,231 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cache_keys import canonicalize_value
+
+SCHEMA_PATH = Path(__file__).parent / 'create_demographic_analysis_table.sql'
+
+# Spellings that canonicalize differently from the allowed value they stand for
+VALUE_SYNONYMS = {
+    'gender': {
+        'boy': 'male',
+        'girl': 'female',
+    },
+}
+
+# Allowed values that stand for anything else, e.g. gender IN (..., 'other'); a column
+# allowing one of these takes any other non-blank value instead of rejecting the record
+CATCH_ALL_VALUES = ('other',)
+
+
+class InvalidValueError(ValueError):
+    """
+    A value that cannot be made to satisfy its column's constraint
+    """
+
+
+class InvalidRecordError(ValueError):
+    """
+    A record with at least one value that can never satisfy the table's constraints
+    """
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__("; ".join(f"{column}: {error}" for column, error in errors.items()))
+
+    def __reduce__(self):
+        # Rebuilt from the errors rather than the message, e.g. when raised in a worker process
+        return type(self), (self.errors,)
+
+
+class ColumnRule(ABC):
+    """
+    Constraint on one column together with the normalization that satisfies it
+    """
+
+    def __init__(self, column_name: str):
+        self.column_name = column_name
+
+    @abstractmethod
+    def normalize(self, value) -> str:
+        """
+        Return the value in the form the constraint accepts
+
+        Raises:
+            InvalidValueError: If no form of the value satisfies the constraint
+        """
+
+
+class AllowedValuesRule(ColumnRule):
+    """
+    Column restricted to a fixed set of values, e.g. gender IN ('male', 'female', ...)
+
+    Values matching none of them map to the catch-all value if the set has one
+    (see CATCH_ALL_VALUES), with a warning, and are rejected otherwise. Values
+    with nothing but whitespace or punctuation are always rejected.
+    """
+
+    def __init__(self, column_name: str, allowed: List[str], synonyms: Optional[Dict[str, str]] = None):
+        super().__init__(column_name)
+        self.allowed = allowed
+        self.catch_all = next((value for value in allowed if value in CATCH_ALL_VALUES), None)
+        self._lookup = {canonicalize_value(value, column_name): value for value in allowed}
+        for synonym, value in (synonyms or {}).items():
+            self._lookup[canonicalize_value(synonym, column_name)] = value
+
+    def normalize(self, value) -> str:
+        canonical = canonicalize_value(value, self.column_name)
+        if not canonical:
+            raise InvalidValueError(f"{value!r} is blank")
+        allowed = self._lookup.get(canonical)
+        if allowed is None:
+            if self.catch_all is None:
+                raise InvalidValueError(f"{value!r} is not one of {', '.join(self.allowed)}")
+            logging.warning(f"Unrecognized {self.column_name} {value!r} - storing it as {self.catch_all!r}")
+            return self.catch_all
+        return allowed
+
+
+class PatternRule(ColumnRule):
+    """
+    Column restricted to a regular expression, applied after an optional cleaner
+    """
+
+    def __init__(self, column_name: str, pattern: str, cleaner: Optional[Callable[[str], str]] = None):
+        super().__init__(column_name)
+        self.pattern = re.compile(pattern)
+        self.cleaner = cleaner
+
+    def normalize(self, value) -> str:
+        cleaned = str(value).strip()
+        if self.cleaner:
+            cleaned = self.cleaner(cleaned)
+        if not self.pattern.search(cleaned):
+            raise InvalidValueError(f"{value!r} does not match {self.pattern.pattern}")
+        return cleaned
+
+
+class IntegerRangeRule(ColumnRule):
+    """
+    Integer column restricted to a range, e.g. age > 0 AND age < 120
+    """
+
+    _WHOLE_NUMBER = re.compile(r"^\s*(\d+)(?:\.0+)?\s*$")
+
+    def __init__(self, column_name: str, minimum: int, maximum: int):
+        super().__init__(column_name)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def normalize(self, value) -> str:
+        match = self._WHOLE_NUMBER.match(str(value))
+        if not match:
+            raise InvalidValueError(f"{value!r} is not a whole number")
+        number = int(match.group(1))
+        if not self.minimum <= number <= self.maximum:
+            raise InvalidValueError(f"{number} is outside {self.minimum}-{self.maximum}")
+        return str(number)
+
+
+def clean_zip_code(value: str) -> str:
+    """
+    Collapse separators in ZIP codes and add the ZIP+4 dash to nine-digit runs
+    """
+    digits = re.sub(r"[\s.-]", '', value)
+    if re.fullmatch(r"\d{9}", digits):
+        return f"{digits[:5]}-{digits[5:]}"
+    return digits if digits.isdigit() else value
+
+
+VALUE_CLEANERS = {
+    'zip_code': clean_zip_code,
+}
+
+_CHECK = re.compile(r"CHECK\s*\((.*)\)\s*,?\s*$", re.IGNORECASE)
+_IN_LIST = re.compile(r"^(\w+)\s+IN\s*\((.*)\)$", re.IGNORECASE)
+_REGEX = re.compile(r"^(\w+)\s*~\s*'(.*)'$")
+_RANGE = re.compile(r"^(\w+)\s*(>=|>)\s*(-?\d+)\s+AND\s+\1\s*(<=|<)\s*(-?\d+)$", re.IGNORECASE)
+
+
+def parse_check_constraint(expression: str) -> Optional[ColumnRule]:
+    """
+    Build a rule from the body of a CHECK constraint, if it has a supported shape
+
+    Supported: column IN ('a', 'b'), column ~ 'regex', column > n AND column < m.
+    """
+    expression = expression.strip()
+    match = _IN_LIST.match(expression)
+    if match:
+        column_name = match.group(1)
+        return AllowedValuesRule(column_name, re.findall(r"'([^']*)'", match.group(2)),
+                                 VALUE_SYNONYMS.get(column_name))
+    match = _REGEX.match(expression)
+    if match:
+        column_name = match.group(1)
+        return PatternRule(column_name, match.group(2), VALUE_CLEANERS.get(column_name))
+    match = _RANGE.match(expression)
+    if match:
+        column_name, lower_op, lower, upper_op, upper = match.groups()
+        minimum = int(lower) + (1 if lower_op == '>' else 0)
+        maximum = int(upper) - (1 if upper_op == '<' else 0)
+        return IntegerRangeRule(column_name, minimum, maximum)
+    return None
+
+
+def load_column_rules(schema_path: Path = SCHEMA_PATH) -> Dict[str, ColumnRule]:
+    """
+    Column rules derived from the CHECK constraints of the table definition
+
+    Returns:
+        dict: Column name -> rule; empty if the schema file cannot be read
+    """
+    try:
+        schema = Path(schema_path).read_text()
+    except OSError as e:
+        logging.warning(f"Could not read table schema {schema_path}, no local column rules: {e}")
+        return {}
+    rules = {}
+    for line in schema.splitlines():
+        match = _CHECK.search(line.split('--')[0])
+        if not match:
+            continue
+        rule = parse_check_constraint(match.group(1))
+        if rule:
+            rules[rule.column_name] = rule
+    return rules
+
+
+COLUMN_RULES = load_column_rules()
+
+
+def normalize_record(values: dict, columns: Iterable[str], rules: Dict[str, ColumnRule] = COLUMN_RULES) -> dict:
+    """
+    Apply the column rules to the given columns of a record
+
+    Columns without a rule are left as they are; columns with a rule are required.
+
+    Returns:
+        dict: Copy of values with the ruled columns normalized
+
+    Raises:
+        InvalidRecordError: Listing every column that cannot satisfy its constraint
+    """
+    normalized = dict(values)
+    errors = {}
+    for column_name in columns:
+        rule = rules.get(column_name)
+        if rule is None:
+            continue
+        if values.get(column_name) is None or not str(values[column_name]).strip():
+            errors[column_name] = "missing"
+            continue
+        try:
+            normalized[column_name] = rule.normalize(values[column_name])
+        except InvalidValueError as e:
+            errors[column_name] = str(e)
+    if errors:
+        raise InvalidRecordError(errors)
+    return normalized
@@ -0,0 +1,207 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from report_parser import sidecar_path
+
+# Outcomes recorded per file
+LOADED = 'loaded'  # row inserted into the table
+SAVED = 'saved'  # SQL written but not executed
+REJECTED = 'rejected'  # record fails the table's constraints
+DUPLICATE = 'duplicate'  # skipped as a duplicate of an existing row
+FAILED = 'failed'  # error while processing
+
+# Outcomes that stay valid until the file changes; files with any other status are retried
+FINAL_STATUSES = (LOADED, REJECTED, DUPLICATE)
+# A file holding several reports takes the first of these its reports ended with
+STATUS_PRECEDENCE = (FAILED, SAVED, LOADED, DUPLICATE, REJECTED)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FileSignature(NamedTuple):
+    size: int
+    mtime_ns: int
+    content_hash: Optional[str]  # None until computed
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    row_id: Optional[int]  # first row inserted for the file
+    status: str
+    processed_at: float
+    error: Optional[str]
+
+
+Outcome = Tuple[str, Optional[int], Optional[str]]  # (status, row id, error)
+
+
+def combine_outcomes(outcomes: List[Outcome]) -> Outcome:
+    """
+    Outcome of a file from the (status, row id, error) outcomes of its reports
+
+    Returns:
+        tuple: (status by STATUS_PRECEDENCE, first row id, errors joined)
+    """
+    statuses = {status for status, _, _ in outcomes}
+    status = next(status for status in STATUS_PRECEDENCE if status in statuses)
+    row_id = next((row_id for _, row_id, _ in outcomes if row_id is not None), None)
+    errors = [error for _, _, error in outcomes if error]
+    return status, row_id, '; '.join(errors) or None
+
+
+def report_files(path) -> List[Path]:
+    """
+    Files a report is read from: the .txt file and its JSON sidecar, if any
+    """
+    sidecar = sidecar_path(path)
+    return [Path(path), sidecar] if sidecar.exists() else [Path(path)]
+
+
+def stat_signature(path) -> FileSignature:
+    """
+    Combined size and latest mtime of a report's files, without reading them
+    """
+    stats = [file.stat() for file in report_files(path)]
+    return FileSignature(sum(stat.st_size for stat in stats), max(stat.st_mtime_ns for stat in stats), None)
+
+
+def content_hash(path) -> str:
+    """
+    SHA-256 over the contents of a report's files
+    """
+    digest = hashlib.sha256()
+    for file in report_files(path):
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    """
+    Persistent record of which analysis files have been processed, and with what outcome
+
+    Each file is identified by its path and signature (size, mtime, content
+    hash). A file whose size and mtime match its entry is unchanged without
+    being read; one whose stat changed is hashed, so a touched but identical
+    file is still recognized. Entries are loaded into memory once, making the
+    check O(1) per file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS file_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            row_id INTEGER,
+            status TEXT NOT NULL,
+            processed_at REAL NOT NULL,
+            error TEXT
+        )
+    """
+
+    BUSY_TIMEOUT_SECONDS = 30
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=self.BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self.SCHEMA)
+        self._conn.commit()
+        self._entries: Optional[Dict[str, ManifestEntry]] = None
+
+    def _load(self) -> Dict[str, ManifestEntry]:
+        if self._entries is None:
+            rows = self._conn.execute(f"SELECT {', '.join(ManifestEntry._fields)} FROM file_manifest")
+            self._entries = {row[0]: ManifestEntry(*row) for row in rows}
+        return self._entries
+
+    def get(self, path) -> Optional[ManifestEntry]:
+        with self._lock:
+            return self._load().get(str(Path(path).resolve()))
+
+    def entries(self) -> List[ManifestEntry]:
+        with self._lock:
+            return list(self._load().values())
+
+    def check(self, path) -> Optional[FileSignature]:
+        """
+        Signature of a file that needs processing, or None if it is unchanged since a final outcome
+
+        A file with a new stat but unchanged content has its entry's stat refreshed.
+        """
+        key = str(Path(path).resolve())
+        signature = stat_signature(path)
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and entry.size == signature.size and entry.mtime_ns == signature.mtime_ns:
+            if entry.status in FINAL_STATUSES:
+                return None
+            return signature._replace(content_hash=entry.content_hash)
+        signature = signature._replace(content_hash=content_hash(path))
+        if entry and entry.content_hash == signature.content_hash:
+            with self._lock:
+                self._conn.execute("UPDATE file_manifest SET size = ?, mtime_ns = ? WHERE path = ?",
+                                   (signature.size, signature.mtime_ns, key))
+                self._conn.commit()
+                self._entries[key] = entry._replace(size=signature.size, mtime_ns=signature.mtime_ns)
+            if entry.status in FINAL_STATUSES:
+                return None
+        return signature
+
+    def pending(self, paths: Iterable) -> Dict[str, FileSignature]:
+        """
+        The given files that need processing: new, changed, or without a final outcome
+
+        Returns:
+            dict: Path -> signature to pass to record(), in the order of paths
+        """
+        pending = {}
+        for path in paths:
+            signature = self.check(path)
+            if signature is not None:
+                pending[path] = signature
+        return pending
+
+    def record(self, path, signature: FileSignature, status: str, row_id: Optional[int] = None,
+               error: Optional[str] = None):
+        """
+        Store the outcome of processing a file as it was when check() or pending() saw it
+        """
+        if signature.content_hash is None:
+            signature = signature._replace(content_hash=content_hash(path))
+        entry = ManifestEntry(str(Path(path).resolve()), signature.size, signature.mtime_ns,
+                              signature.content_hash, row_id, status, time.time(), error)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO file_manifest ({', '.join(ManifestEntry._fields)}) "
+                f"VALUES ({', '.join('?' * len(ManifestEntry._fields))})",
+                entry
+            )
+            self._conn.commit()
+            self._load()[entry.path] = entry
+
+    def forget(self, path):
+        """
+        Drop a file's entry so it is processed again
+        """
+        key = str(Path(path).resolve())
+        with self._lock:
+            self._conn.execute("DELETE FROM file_manifest WHERE path = ?", (key,))
+            self._conn.commit()
+            self._load().pop(key, None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,185 @@
+import heapq
+import threading
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from cache_keys import canonicalize_value
+
+NGRAM_SIZE = 3
+
+# Two tokens correspond when their n-gram Dice coefficient reaches this, e.g. "sofware" and "software"
+TOKEN_MATCH_MIN_SCORE = 0.6
+
+# Candidates retrieved by vector similarity that are re-scored exactly
+RERANK_CANDIDATES = 10
+
+# Width of the hashed n-gram vectors; collisions only blur candidate retrieval, not final scores
+VECTOR_DIMENSIONS = 512
+
+
+def token_set_form(value: str, column_name: Optional[str] = None) -> str:
+    """
+    Canonical value with its tokens deduplicated and sorted, so word order does not affect matching
+    """
+    return ' '.join(sorted(set(canonicalize_value(value, column_name).split())))
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """
+    Character n-grams of text padded with one space on each side
+    """
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+
+def token_ngrams(form: str) -> List[set]:
+    return [char_ngrams(token) for token in form.split()]
+
+
+def token_agreement(ngrams: List[set], other_ngrams: List[set]) -> float:
+    """
+    Fraction of the tokens on both sides that have a similar token on the other side
+
+    Tokens are given as their n-gram sets (see token_ngrams). Keeps
+    "senior software engineer" from matching "software engineer" on shared n-grams alone.
+    """
+    if not ngrams or not other_ngrams:
+        return 0.0
+    matched = sum(1 for a in ngrams if any(dice(a, b) >= TOKEN_MATCH_MIN_SCORE for b in other_ngrams))
+    other_matched = sum(1 for b in other_ngrams if any(dice(a, b) >= TOKEN_MATCH_MIN_SCORE for a in ngrams))
+    return (matched + other_matched) / (len(ngrams) + len(other_ngrams))
+
+
+class FuzzyMatcher:
+    """
+    Character n-gram index over the existing values of one column
+
+    Values are compared on their token-set form. Candidates are retrieved by
+    cosine similarity of hashed n-gram vectors, one matrix-vector product over
+    all values, then scored by the Dice coefficient of their n-gram sets scaled
+    by their token agreement, so only values with the same words, up to typos,
+    can score high. Existing values that share a token-set form are indexed
+    once, under the first of them, so duplicates never make a match ambiguous.
+    Safe to share between threads.
+    """
+
+    def __init__(self, values: Iterable[str] = (), column_name: Optional[str] = None,
+                 dimensions: int = VECTOR_DIMENSIONS):
+        self.column_name = column_name
+        self.dimensions = dimensions
+        self.values = []  # one representative value per token-set form
+        self._seen = set()
+        self._forms = {}  # token-set form -> position in values
+        self._token_ngrams = []
+        self._ngrams = []
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)  # rows past len(values) are spare capacity
+        self._lock = threading.RLock()
+        self.add(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _vectorize(self, ngrams: set) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        vector[[zlib.crc32(ngram.encode()) % self.dimensions for ngram in ngrams]] = 1.0
+        return vector / np.linalg.norm(vector)
+
+    def add(self, values: Iterable[str]) -> int:
+        """
+        Index values not seen before, growing the vector matrix in place
+
+        Returns:
+            int: Number of new token-set forms indexed
+        """
+        with self._lock:
+            start = len(self.values)
+            rows = []
+            for value in values:
+                if value is None or value in self._seen:
+                    continue
+                self._seen.add(value)
+                form = token_set_form(value, self.column_name)
+                if form in self._forms:
+                    continue
+                self._forms[form] = len(self.values)
+                self.values.append(value)
+                self._token_ngrams.append(token_ngrams(form))
+                ngrams = char_ngrams(form)
+                self._ngrams.append(ngrams)
+                rows.append(self._vectorize(ngrams))
+            if rows:
+                size = len(self.values)
+                if size > len(self._matrix):
+                    matrix = np.zeros((max(size, 2 * len(self._matrix)), self.dimensions), dtype=np.float32)
+                    matrix[:start] = self._matrix[:start]
+                    self._matrix = matrix
+                self._matrix[start:size] = np.stack(rows)
+            return len(rows)
+
+    def _nearest(self, ngrams: set, k: int) -> np.ndarray:
+        """
+        Positions of the (up to) k values with the most similar n-gram vectors
+        """
+        size = len(self.values)
+        if not size:
+            return np.empty(0, dtype=np.intp)
+        similarities = self._matrix[:size] @ self._vectorize(ngrams)
+        positions = np.argpartition(-similarities, k - 1)[:k] if k < size else np.arange(size)
+        return positions[similarities[positions] > 0]
+
+    def top_matches(self, input_value: str, limit: int = 2) -> List[Tuple[str, float]]:
+        """
+        Score the existing values most similar to input_value
+
+        Returns:
+            list: Up to limit (value, score) pairs, best first, scores in [0, 1]
+        """
+        form = token_set_form(input_value, self.column_name)
+        ngrams = char_ngrams(form)
+        tokens = token_ngrams(form)
+        with self._lock:
+            scored = [
+                (dice(ngrams, self._ngrams[position]) * token_agreement(tokens, self._token_ngrams[position]), position)
+                for position in self._nearest(ngrams, max(limit, RERANK_CANDIDATES)).tolist()
+            ]
+            return [(self.values[position], score) for score, position in heapq.nlargest(limit, scored)]
+
+    def similar_values(self, input_value: str, k: int) -> List[str]:
+        """
+        The k existing values most similar to input_value, best first
+        """
+        return [value for value, _ in self.top_matches(input_value, k)]
+
+    def match(self, input_value: str, min_score: float, min_margin: float) -> Optional[Tuple[str, float]]:
+        """
+        Best existing value, if it is both similar enough and clearly ahead of the runner-up
+
+        Args:
+            input_value (str): Raw value to match
+            min_score (float): Lowest similarity accepted for the best value
+            min_margin (float): Lowest lead the best value must have over the second best
+
+        Returns:
+            tuple: (existing_value, score), or None when the match is missing or ambiguous
+        """
+        form = token_set_form(input_value, self.column_name)
+        with self._lock:
+            position = self._forms.get(form)
+            if position is not None:
+                return self.values[position], 1.0
+        candidates = self.top_matches(input_value)
+        if not candidates:
+            return None
+        best_value, best_score = candidates[0]
+        runner_up = candidates[1][1] if len(candidates) > 1 else 0.0
+        if best_score < min_score or best_score - runner_up < min_margin:
+            return None
+        return best_value, best_score
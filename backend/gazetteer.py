@@ -0,0 +1,184 @@
+import csv
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from cache_keys import canonicalize_value
+
+DATA_DIR = Path(__file__).parent / 'data'
+# USPS three-digit prefix ranges and the state each belongs to
+ZIP3_STATES_PATH = DATA_DIR / 'zip3_states.csv'
+# Canonical city per ZIP code; rows may give a full five-digit ZIP or a three-digit
+# prefix whose principal city covers the whole prefix. A complete ZIP5 dataset in
+# the same format can replace the bundled file as is.
+ZIP_PLACES_PATH = DATA_DIR / 'zip_places.csv'
+
+# Longest city or state name, in words, looked for in free-text locations
+MAX_NAME_TOKENS = 4
+
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota',
+    'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia',
+    'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+    'PR': 'Puerto Rico', 'VI': 'Virgin Islands', 'GU': 'Guam',
+}
+
+
+class Place(NamedTuple):
+    city: Optional[str]
+    state: str
+
+    @property
+    def label(self) -> str:
+        """
+        Canonical location for the table, e.g. "Washington, DC"
+        """
+        return f"{self.city}, {self.state}" if self.city else STATE_NAMES.get(self.state, self.state)
+
+
+class LocationCheck(NamedTuple):
+    place: Place
+    agrees: Optional[bool]  # None when the free text neither confirms nor contradicts the ZIP code
+    mentioned: str  # place named by the free text that contradicts the ZIP code, if any
+    names_city: bool = False  # the free text names the place's city, not just its state
+    exact: bool = False  # the place is the ZIP code's own entry, not its prefix's principal city or state
+
+
+def _phrases(canonical: str) -> Set[str]:
+    """
+    Every run of up to MAX_NAME_TOKENS consecutive words of a canonical value
+    """
+    tokens = canonical.split()
+    return {
+        ' '.join(tokens[start:end])
+        for start in range(len(tokens))
+        for end in range(start + 1, min(start + MAX_NAME_TOKENS, len(tokens)) + 1)
+    }
+
+
+class ZipGazetteer:
+    """
+    Offline ZIP code -> canonical city/state lookup
+
+    ZIP3 prefixes resolve to states through a 1000-slot list; known ZIP codes and
+    prefixes resolve to a place through one dict, with each distinct place stored
+    once. Lookups are O(1) and need no network access.
+    """
+
+    def __init__(self, zip3_states: Dict[str, str], places: Dict[str, Place]):
+        self._states: List[Optional[str]] = [None] * 1000
+        for prefix, state in zip3_states.items():
+            self._states[int(prefix)] = sys.intern(state)
+        interned = {}
+        self._places: Dict[str, Place] = {
+            zip_code: interned.setdefault(place, place) for zip_code, place in places.items()
+        }
+        # Canonical city and state names -> states they may refer to, to recognize them in free text
+        self._names: Dict[str, Set[str]] = {}
+        for place in interned:
+            if place.city:
+                self._names.setdefault(canonicalize_value(place.city, 'location'), set()).add(place.state)
+        # Canonical state names -> state, to recognize a state named outright
+        self._state_names: Dict[str, str] = {
+            canonicalize_value(name, 'location'): state for state, name in STATE_NAMES.items()
+        }
+        for name, state in self._state_names.items():
+            self._names.setdefault(name, set()).add(state)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    @classmethod
+    def load(cls, zip3_path: Path = ZIP3_STATES_PATH, places_path: Path = ZIP_PLACES_PATH) -> 'ZipGazetteer':
+        """
+        Read the bundled gazetteer files; a missing or unreadable file leaves its part empty
+        """
+        zip3_states = {}
+        places = {}
+        try:
+            with open(zip3_path, newline='') as f:
+                for row in csv.DictReader(f):
+                    for prefix in range(int(row['first_prefix']), int(row['last_prefix']) + 1):
+                        zip3_states[f"{prefix:03d}"] = row['state'].strip().upper()
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Could not load ZIP prefix states from {zip3_path}: {e}")
+        try:
+            with open(places_path, newline='') as f:
+                for row in csv.DictReader(f):
+                    places[row['zip'].strip()] = Place(row['city'].strip() or None, row['state'].strip().upper())
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Could not load ZIP places from {places_path}: {e}")
+        return cls(zip3_states, places)
+
+    def lookup(self, zip_code: str) -> Optional[Place]:
+        """
+        Place of a ZIP code: its exact entry, else its prefix's principal city, else just its state
+
+        Accepts five-digit and ZIP+4 codes.
+        """
+        zip5 = str(zip_code).strip()[:5]
+        if len(zip5) != 5 or not zip5.isdigit():
+            return None
+        place = self._places.get(zip5) or self._places.get(zip5[:3])
+        if place:
+            return place
+        state = self._states[int(zip5[:3])]
+        return Place(None, state) if state else None
+
+    def check(self, location: str, zip_code: str) -> Optional[LocationCheck]:
+        """
+        Compare a free-text location with the place of its ZIP code
+
+        The location agrees when it names the ZIP code's city or state, and
+        disagrees when it names only places in other states, e.g. "seattle"
+        with 20001, or names the city but another state outright, e.g.
+        "Portland, ME" with 97201. Anything else, such as a neighborhood, is
+        left undecided. State abbreviations are compared on the text without
+        abbreviation expansion, so a trailing "LA" or "MT" stays a state.
+
+        Returns:
+            LocationCheck: Or None if the ZIP code is unknown
+        """
+        place = self.lookup(zip_code)
+        if place is None:
+            return None
+        exact = str(zip_code).strip()[:5] in self._places
+        canonical = canonicalize_value(location, 'location')
+        padded = f" {canonical} "
+        raw_tokens = canonicalize_value(location).split()
+        last_token = raw_tokens[-1] if raw_tokens else ''
+        city = f" {canonicalize_value(place.city, 'location')} " if place.city else None
+        if city and city in padded:
+            # States named outright besides the city's own name, e.g. not "kansas" in "Kansas City, MO"
+            named_states = {
+                self._state_names[phrase]: phrase
+                for phrase in _phrases(padded.replace(city, ' ').strip()) if phrase in self._state_names
+            }
+            if last_token.upper() in STATE_NAMES:
+                named_states[last_token.upper()] = last_token.upper()
+            if named_states and place.state not in named_states:
+                return LocationCheck(place, False, max(named_states.values(), key=len), exact=exact)
+            return LocationCheck(place, True, '', names_city=True, exact=exact)
+        state_name = canonicalize_value(STATE_NAMES.get(place.state, place.state), 'location')
+        if f" {state_name} " in padded or last_token == place.state.lower():
+            return LocationCheck(place, True, '', exact=exact)
+        named = sorted(
+            (phrase for phrase in _phrases(canonical) if phrase in self._names),
+            key=len, reverse=True
+        )
+        states = set().union(*(self._names[phrase] for phrase in named))
+        if last_token.upper() in STATE_NAMES:
+            states.add(last_token.upper())
+            named.append(last_token.upper())
+        if states and place.state not in states:
+            return LocationCheck(place, False, named[0], exact=exact)
+        return LocationCheck(place, None, '', exact=exact)
@@ -0,0 +1,419 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+# Provider limits; each can be overridden by the environment variable of the same name,
+# read when the provider's gateway is first used (after .env files are loaded)
+OPENAI_REQUESTS_PER_MINUTE = 500
+OPENAI_TOKENS_PER_MINUTE = 40000
+ANTHROPIC_REQUESTS_PER_MINUTE = 50
+ANTHROPIC_TOKENS_PER_MINUTE = 40000
+LLM_MAX_CONCURRENCY = 8
+
+LLM_MAX_RETRIES = 5
+LLM_RETRY_BASE_DELAY = 1.0  # Seconds; doubles per attempt before jitter
+LLM_RETRY_MAX_DELAY = 60.0
+
+# Completion allowance used in token estimates when a request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors and overload
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Rate-limit response headers: (remaining requests, requests reset, remaining tokens, tokens reset)
+OPENAI_RATE_LIMIT_HEADERS = (
+    'x-ratelimit-remaining-requests', 'x-ratelimit-reset-requests',
+    'x-ratelimit-remaining-tokens', 'x-ratelimit-reset-tokens'
+)
+ANTHROPIC_RATE_LIMIT_HEADERS = (
+    'anthropic-ratelimit-requests-remaining', 'anthropic-ratelimit-requests-reset',
+    'anthropic-ratelimit-tokens-remaining', 'anthropic-ratelimit-tokens-reset'
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds until a rate limit resets, from a header value
+
+    Accepts plain seconds ("20"), OpenAI durations ("6m0s", "250ms") and
+    Anthropic RFC 3339 timestamps.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and ''.join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        reset_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max((reset_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously up to its capacity
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Block until amount tokens are available, then take them
+
+        Requests larger than the capacity wait for a full bucket.
+        """
+        amount = min(amount, self.capacity)
+        with self._condition:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                self._condition.wait((amount - self._tokens) / self.rate)
+
+    def adjust(self, delta: float):
+        """
+        Take (positive) or return (negative) tokens once a request's real cost is known
+
+        The balance may go negative, which delays later requests.
+        """
+        with self._condition:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+            self._condition.notify_all()
+
+    def drain(self):
+        with self._condition:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Concurrency limit that halves on rate limiting and grows back by one per window of successes
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, rate_limited: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class LLMGateway:
+    """
+    Shared access to one LLM provider
+
+    Keeps one long-lived client (and its HTTP connection pool) for all callers,
+    and applies request and token budgets per minute, an adaptive concurrency
+    limit, and retries with jittered exponential backoff. Safe to share between
+    threads.
+    """
+
+    def __init__(self, name: str, client_factory: Callable[[], object], requests_per_minute: int,
+                 tokens_per_minute: int, rate_limit_headers: Tuple[str, str, str, str],
+                 retryable_errors: Tuple[type, ...], max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES, base_delay: float = LLM_RETRY_BASE_DELAY,
+                 max_delay: float = LLM_RETRY_MAX_DELAY):
+        self.name = name
+        self.client_factory = client_factory
+        self.rate_limit_headers = rate_limit_headers
+        self.retryable_errors = retryable_errors
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimit(max_concurrency)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._resume_at = 0.0
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self.client_factory()
+            return self._client
+
+    def _pause(self, seconds: float):
+        """
+        Hold back every caller for seconds, e.g. until a rate limit resets
+        """
+        with self._stats_lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_resume(self):
+        while True:
+            with self._stats_lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _observe_headers(self, headers):
+        """
+        Pause until the provider's window resets once it reports no requests or tokens left
+        """
+        if headers is None:
+            return
+        remaining_requests, reset_requests, remaining_tokens, reset_tokens = self.rate_limit_headers
+        for remaining_header, reset_header, bucket in ((remaining_requests, reset_requests, self.requests),
+                                                       (remaining_tokens, reset_tokens, self.tokens)):
+            remaining = headers.get(remaining_header)
+            if remaining is not None and remaining.strip() == '0':
+                bucket.drain()
+                reset = parse_reset(headers.get(reset_header))
+                if reset:
+                    self._pause(reset)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, self.retryable_errors):
+            return True
+        return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Full-jitter exponential backoff, never shorter than the server's retry-after
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = parse_reset(response.headers.get('retry-after')) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+    def call(self, send: Callable[[object], object], estimated_tokens: int,
+             usage_tokens: Callable[[object], Optional[int]] = lambda result: None):
+        """
+        Send one request through the gateway
+
+        Args:
+            send (callable): Takes the client and returns a raw response (SDK with_raw_response)
+            estimated_tokens (int): Token cost charged before sending
+            usage_tokens (callable): Real token cost from the parsed result, if known
+
+        Returns:
+            The parsed response
+
+        Raises:
+            Exception: The last error once retries are exhausted, or any non-retryable error
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_resume()
+            self.requests.acquire()
+            self.tokens.acquire(estimated_tokens)
+            self.concurrency.acquire()
+            rate_limited = False
+            try:
+                with self._stats_lock:
+                    self.calls += 1
+                raw = send(self.client)
+                self._observe_headers(getattr(raw, 'headers', None))
+                result = raw.parse()
+                actual_tokens = usage_tokens(result)
+                if actual_tokens is not None:
+                    self.tokens.adjust(actual_tokens - estimated_tokens)
+                return result
+            except Exception as e:
+                if not self._is_retryable(e):
+                    with self._stats_lock:
+                        self.failures += 1
+                    raise
+                rate_limited = getattr(e, 'status_code', None) == 429
+                response = getattr(e, 'response', None)
+                if response is not None:
+                    self._observe_headers(response.headers)
+                with self._stats_lock:
+                    self.rate_limited += rate_limited
+                    if attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    self.retries += 1
+                delay = self._retry_delay(attempt, e)
+                logging.warning(f"{self.name} request failed ({e}); retry {attempt + 1}/{self.max_retries} "
+                                f"in {delay:.1f}s")
+                if rate_limited:
+                    self._pause(delay)
+                else:
+                    time.sleep(delay)
+            finally:
+                self.concurrency.release(rate_limited=rate_limited)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'failures': self.failures,
+                'concurrency_limit': self.concurrency.limit
+            }
+
+
+def estimate_tokens(texts, max_tokens: Optional[int] = None) -> int:
+    """
+    Rough token cost of a request: about four characters per prompt token plus the completion allowance
+    """
+    prompt_tokens = sum(len(text) for text in texts if isinstance(text, str)) // 4
+    return prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _setting(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _budget(name: str, default: int) -> int:
+    """
+    This process's part of a provider limit, see set_gateway_share()
+    """
+    return max(1, int(_setting(name, default) * _gateway_share))
+
+
+def _create_openai_gateway() -> LLMGateway:
+    import openai
+    return LLMGateway(
+        'OpenAI',
+        # The gateway owns retries, so the SDK's own are disabled
+        lambda: openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0),
+        _budget('OPENAI_REQUESTS_PER_MINUTE', OPENAI_REQUESTS_PER_MINUTE),
+        _budget('OPENAI_TOKENS_PER_MINUTE', OPENAI_TOKENS_PER_MINUTE),
+        OPENAI_RATE_LIMIT_HEADERS,
+        (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError),
+        max_concurrency=_budget('LLM_MAX_CONCURRENCY', LLM_MAX_CONCURRENCY)
+    )
+
+
+def _create_anthropic_gateway() -> LLMGateway:
+    import anthropic
+    return LLMGateway(
+        'Anthropic',
+        lambda: anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0),
+        _budget('ANTHROPIC_REQUESTS_PER_MINUTE', ANTHROPIC_REQUESTS_PER_MINUTE),
+        _budget('ANTHROPIC_TOKENS_PER_MINUTE', ANTHROPIC_TOKENS_PER_MINUTE),
+        ANTHROPIC_RATE_LIMIT_HEADERS,
+        (anthropic.RateLimitError, anthropic.APIConnectionError, anthropic.InternalServerError),
+        max_concurrency=_budget('LLM_MAX_CONCURRENCY', LLM_MAX_CONCURRENCY)
+    )
+
+
+_GATEWAY_FACTORIES = {
+    'openai': _create_openai_gateway,
+    'anthropic': _create_anthropic_gateway,
+}
+_gateways: Dict[str, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+# Fraction of each provider limit this process may use, below 1 in worker processes that share them
+_gateway_share = 1.0
+
+
+def get_gateway(provider: str) -> LLMGateway:
+    """
+    Process-wide gateway for a provider ('openai' or 'anthropic'), created on first use
+    """
+    with _gateways_lock:
+        if provider not in _gateways:
+            _gateways[provider] = _GATEWAY_FACTORIES[provider]()
+        return _gateways[provider]
+
+
+def set_gateway_share(share: float):
+    """
+    Limit this process to a share of each provider's budgets and concurrency
+
+    Meant for worker processes: with n workers each taking 1/n, together they
+    stay within the provider limits. Gateways already created are discarded so
+    the next call creates new ones, with their own clients, under the new share.
+    """
+    global _gateway_share
+    with _gateways_lock:
+        _gateway_share = share
+        _gateways.clear()
+
+
+def gateway_stats() -> Dict[str, dict]:
+    with _gateways_lock:
+        return {gateway.name: gateway.get_stats() for gateway in _gateways.values()}
+
+
+def chat_completion(**kwargs):
+    """
+    OpenAI chat completion through the shared gateway; takes the arguments of chat.completions.create
+    """
+    estimated = estimate_tokens([message.get('content') for message in kwargs.get('messages', [])],
+                                kwargs.get('max_tokens'))
+    return get_gateway('openai').call(
+        lambda client: client.chat.completions.with_raw_response.create(**kwargs),
+        estimated,
+        lambda response: getattr(getattr(response, 'usage', None), 'total_tokens', None)
+    )
+
+
+def _anthropic_usage(message) -> Optional[int]:
+    usage = getattr(message, 'usage', None)
+    if usage is None:
+        return None
+    return (usage.input_tokens or 0) + (usage.output_tokens or 0)
+
+
+def create_message(**kwargs):
+    """
+    Anthropic message through the shared gateway; takes the arguments of messages.create
+    """
+    texts = [kwargs.get('system')] + [message.get('content') for message in kwargs.get('messages', [])]
+    return get_gateway('anthropic').call(
+        lambda client: client.messages.with_raw_response.create(**kwargs),
+        estimate_tokens(texts, kwargs.get('max_tokens')),
+        _anthropic_usage
+    )
@@ -0,0 +1,67 @@
+import threading
+from typing import Dict, Optional
+
+
+class RoutingTier:
+    """
+    One step of a normalization escalation policy, with its running counters
+
+    A tier either resolves a value or escalates it to the next tier. Calls,
+    latency and token usage are recorded per request, outcomes per value, so a
+    batch request counts as one call that resolves or escalates several values.
+    Costs are USD per 1K tokens; a tier without a model (local matching) is free.
+    Safe to share between threads.
+    """
+
+    def __init__(self, name: str, model: Optional[str] = None,
+                 input_cost_per_1k: float = 0.0, output_cost_per_1k: float = 0.0):
+        self.name = name
+        self.model = model
+        self.input_cost_per_1k = input_cost_per_1k
+        self.output_cost_per_1k = output_cost_per_1k
+        self.calls = 0
+        self.resolved = 0
+        self.escalated = 0
+        self.failures = 0
+        self.latency_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record_call(self, latency_seconds: float, usage=None):
+        """
+        Count one request, with the token usage reported by the API if any
+        """
+        with self._lock:
+            self.calls += 1
+            self.latency_seconds += latency_seconds
+            if usage is not None:
+                self.prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+                self.completion_tokens += getattr(usage, 'completion_tokens', 0) or 0
+
+    def record_outcome(self, resolved: int = 0, escalated: int = 0, failed: int = 0):
+        """
+        Count values this tier resolved, passed on to the next tier, or failed to answer
+        """
+        with self._lock:
+            self.resolved += resolved
+            self.escalated += escalated
+            self.failures += failed
+
+    @property
+    def cost(self) -> float:
+        return (self.prompt_tokens * self.input_cost_per_1k + self.completion_tokens * self.output_cost_per_1k) / 1000
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'model': self.model,
+                'calls': self.calls,
+                'resolved': self.resolved,
+                'escalated': self.escalated,
+                'failures': self.failures,
+                'avg_latency_seconds': self.latency_seconds / self.calls if self.calls else 0.0,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'cost': self.cost,
+            }
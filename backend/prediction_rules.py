@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Optional JSON file replacing DEFAULT_PREDICTION_FORMATS, in the same shape
+PREDICTION_RULES_PATH = Path(os.getenv('PREDICTION_RULES_PATH', Path(__file__).parent / 'prediction_rules.json'))
+
+# Canonical prediction values per category. Each category lists [pattern, output]
+# rules in priority order: the first pattern found anywhere in the prediction
+# decides its value, whatever its position. Patterns are matched case-insensitively;
+# outputs may refer to the pattern's own groups as \g<1>. Predictions matching no
+# pattern get the category's default.
+DEFAULT_PREDICTION_FORMATS = {
+    "employment_type": {
+        "patterns": [
+            [r"full[-\s]?time", "Full-time"],
+            [r"part[-\s]?time", "Part-time"],
+            [r"contract", "Contract"],
+            [r"freelance", "Freelance"],
+            [r"self[-\s]?employed", "Self-employed"],
+        ],
+        "default": "Full-time",
+    },
+    "income_bracket": {
+        "patterns": [
+            [r"\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)", r"$\g<1> - $\g<2>"],
+            [r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)", r"$\g<1> - $\g<2>"],
+        ],
+        "default": "Not specified",
+    },
+    "education_level": {
+        "patterns": [
+            [r"bachelor['']?s", "Bachelor's degree"],
+            [r"master['']?s", "Master's degree"],
+            [r"ph\.?d", "PhD"],
+            [r"associate['']?s", "Associate's degree"],
+            [r"high school", "High school diploma"],
+        ],
+        "default": "Not specified",
+    },
+    "housing_status": {
+        "patterns": [
+            [r"rent(?:ing|ed)?", "Renting"],
+            [r"own(?:ing|ed)?", "Owning"],
+            [r"mortgage", "Mortgage"],
+            [r"apartment", "Apartment"],
+            [r"house", "House"],
+        ],
+        "default": "Not specified",
+    },
+    "work_schedule_type": {
+        "patterns": [
+            [r"9[-\s]?5", "9-5"],
+            [r"flexible", "Flexible"],
+            [r"shift", "Shift work"],
+            [r"remote", "Remote"],
+            [r"hybrid", "Hybrid"],
+        ],
+        "default": "Not specified",
+    },
+}
+
+_GROUP_REFERENCE = re.compile(r"\\g<(\d+)>")
+
+
+class CategoryRules:
+    """
+    The rules of one category, each pattern compiled once
+
+    Patterns are searched in priority order; the first that occurs anywhere in
+    the value decides it.
+    """
+
+    def __init__(self, category: str, patterns: List[Tuple[str, str]], default: str):
+        self.category = category
+        self.default = default
+        self.patterns = [(re.compile(pattern, re.IGNORECASE), output) for pattern, output in patterns]
+
+    def normalize(self, value: str) -> str:
+        for pattern, output in self.patterns:
+            match = pattern.search(value)
+            if match:
+                if '\\g<' not in output:
+                    return output
+                return _GROUP_REFERENCE.sub(lambda reference: match.group(int(reference.group(1))) or '', output)
+        return self.default
+
+
+class PredictionRuleRegistry:
+    """
+    Compiled prediction rules for every category, built once from a declarative config
+    """
+
+    def __init__(self, formats: Dict[str, dict]):
+        self.categories: Dict[str, CategoryRules] = {
+            category: CategoryRules(category, [tuple(rule) for rule in rules['patterns']], rules['default'])
+            for category, rules in formats.items()
+        }
+
+    def __contains__(self, category: str) -> bool:
+        return category in self.categories
+
+    @classmethod
+    def load(cls, path: Path = PREDICTION_RULES_PATH) -> 'PredictionRuleRegistry':
+        """
+        Registry from a JSON config file, or from DEFAULT_PREDICTION_FORMATS if there is none
+
+        An unreadable or invalid file is logged and the defaults are used.
+        """
+        path = Path(path)
+        if path.exists():
+            try:
+                return cls(json.loads(path.read_text()))
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                logging.warning(f"Could not load prediction rules from {path}, using defaults: {e}")
+        return cls(DEFAULT_PREDICTION_FORMATS)
+
+    def normalize(self, category: str, value: str) -> Optional[str]:
+        """
+        Canonical value of a prediction, or None if the category has no rules
+        """
+        rules = self.categories.get(category)
+        return rules.normalize(value) if rules else None
+
+
+PREDICTION_RULES = PredictionRuleRegistry.load()
+
+
+# Standard confidence levels and the variations that map to them
+CONFIDENCE_LEVELS = {
+    'high': ['high', 'very high', 'very high confidence', 'high confidence', 'strong', 'strong confidence'],
+    'medium': ['medium', 'moderate', 'moderate confidence', 'medium confidence', 'average', 'average confidence'],
+    'low': ['low', 'very low', 'very low confidence', 'low confidence', 'weak', 'weak confidence']
+}
+CONFIDENCE_VARIATIONS = {
+    variation: standard_level.capitalize()
+    for standard_level, variations in CONFIDENCE_LEVELS.items()
+    for variation in variations
+}
+SOURCE_YEAR = re.compile(r'\d{4}')
+DEFAULT_SOURCE_YEAR = 2024  # Added to sources that cite no year
+
+
+def validate_confidence_level(confidence: str) -> str:
+    """
+    Validate and standardize confidence levels
+
+    Args:
+        confidence (str): Raw confidence level
+
+    Returns:
+        str: Standardized confidence level
+    """
+    # Convert to lowercase and strip whitespace
+    confidence = confidence.lower().strip()
+
+    # Check for numeric confidence scores (0-1 range)
+    try:
+        score = float(confidence)
+        if 0 <= score <= 1:
+            if score >= 0.8:
+                return 'High'
+            elif score >= 0.5:
+                return 'Medium'
+            else:
+                return 'Low'
+    except ValueError:
+        pass
+
+    # Check against known variations
+    if confidence in CONFIDENCE_VARIATIONS:
+        return CONFIDENCE_VARIATIONS[confidence]
+
+    # If no match found, return Medium as default
+    logging.warning(f"Invalid confidence level '{confidence}' - defaulting to Medium")
+    return 'Medium'
+
+
+def normalize_prediction_values(predictions, rules: PredictionRuleRegistry = PREDICTION_RULES):
+    """
+    Normalize prediction values to ensure consistency across all rows
+
+    Args:
+        predictions (dict): Raw predictions from the LLM
+        rules (PredictionRuleRegistry): Canonical values per category
+
+    Returns:
+        dict: Normalized predictions with consistent formatting
+    """
+    normalized = {}
+
+    for category, data in predictions.items():
+        normalized[category] = data.copy()
+
+        # Map the prediction onto its category's canonical values, if it has any
+        if category in rules:
+            normalized[category]['prediction'] = rules.normalize(category, data.get('prediction', ''))
+
+        # Normalize confidence levels
+        if 'confidence' in data:
+            normalized[category]['confidence'] = validate_confidence_level(data['confidence'])
+        else:
+            normalized[category]['confidence'] = 'Medium'  # Default confidence level
+
+        # Normalize sources to include year
+        if 'sources' in data:
+            normalized[category]['sources'] = [
+                source if SOURCE_YEAR.search(source) else f"{source} ({DEFAULT_SOURCE_YEAR})"
+                for source in data['sources']
+            ]
+
+    return normalized
@@ -1,7 +1,8 @@
-import anthropic
 import os
 import json
 from dotenv import load_dotenv
+from llm_gateway import create_message
+from report_parser import sidecar_path, write_report_sidecar
 
 # Load environment variables from .env file (create this file with your API key)
 load_dotenv('.env.local')
@@ -16,11 +17,6 @@ def analyze_demographics(person_data):
     Returns:
         dict: Extended profile with predictions based on web research and LLM
     """
-    # Initialize the Anthropic client
-    client = anthropic.Anthropic(
-        api_key=os.getenv("ANTHROPIC_API_KEY")
-    )
-    
     # Format the input data for the prompt
     input_str = "\n".join([f"{k}: {v}" for k, v in person_data.items()])
     
@@ -70,7 +66,7 @@ def analyze_demographics(person_data):
     Focus on accuracy and specificity over generality.
     """
     
-    research_message = client.messages.create(
+    research_message = create_message(
         model="claude-3-7-sonnet-20250219",
         max_tokens=4000,
         temperature=0.2,
@@ -158,7 +154,7 @@ def analyze_demographics(person_data):
        - economic
     """
     
-    json_message = client.messages.create(
+    json_message = create_message(
         model="claude-3-7-sonnet-20250219",
         max_tokens=4000,
         temperature=0.2,
@@ -285,6 +281,12 @@ def main():
         f.write(formatted_results)
     
     print(f"\nResults saved to {filepath}")
+    
+    # Save the predictions as JSON too, so text_to_sql can read them without re-parsing the text
+    if "error" not in predictions:
+        sidecar = sidecar_path(filepath)
+        write_report_sidecar(sidecar, person_data, predictions)
+        print(f"Structured results saved to {sidecar}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Separator line under the INPUT DATA and DEMOGRAPHIC ANALYSIS RESULTS headings
+SECTION_SEPARATOR = '=' * 30
+
+# Machine-readable copy of a report, written next to its .txt file as JSON Lines:
+# one {"version", "input_data", "predictions"} object per report, predictions as
+# returned by analyze_demographics (with confidence and variations)
+SIDECAR_SUFFIX = '.jsonl'
+SIDECAR_VERSION = 1
+
+# Parser states
+PREAMBLE = 'preamble'  # before the first separator
+INPUT = 'input'  # "key: value" lines of the input data
+PREDICTIONS = 'predictions'  # "## Category" blocks of the analysis results
+
+
+def is_separator(line: str) -> bool:
+    stripped = line.strip()
+    return len(stripped) >= len(SECTION_SEPARATOR) and not stripped.strip('=')
+
+
+def parse_reports(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parse demographic analysis reports from a stream of lines, one report at a time
+
+    A single pass over the lines with a three-state machine. Each report is an
+    INPUT DATA section followed by a DEMOGRAPHIC ANALYSIS RESULTS section, each
+    under a separator line; a separator after the results starts the next
+    report, so exports holding many concatenated reports parse too. Only the
+    report being built is held in memory.
+
+    Args:
+        lines (iterable): Lines of one or more reports, e.g. an open file
+
+    Yields:
+        dict: {'input_data': {...}, 'predictions': {...}} with raw predictions
+    """
+    state = PREAMBLE
+    input_data = {}
+    predictions = {}
+    category, current_data = None, {}
+
+    for line in lines:
+        if is_separator(line):
+            if state == PREAMBLE:
+                state = INPUT
+            elif state == INPUT:
+                state = PREDICTIONS
+            else:
+                if category and current_data:
+                    predictions[category] = current_data
+                yield {'input_data': input_data, 'predictions': predictions}
+                input_data, predictions, category, current_data = {}, {}, None, {}
+                state = INPUT
+            continue
+
+        if state == INPUT:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                input_data[key.strip()] = value.strip()
+        elif state == PREDICTIONS:
+            line = line.strip()
+            if line.startswith('## '):
+                # A category is kept once it has at least one field
+                if category and current_data:
+                    predictions[category] = current_data
+                category, current_data = line[3:].lower().replace(' ', '_'), {}
+            elif line.startswith('Prediction: '):
+                current_data['prediction'] = line[11:].strip()
+            elif line.startswith('Explanation: '):
+                current_data['explanation'] = line[12:].strip()
+            elif line.startswith('- '):
+                current_data.setdefault('sources', []).append(line[2:].strip())
+
+    if state != PREAMBLE:
+        if category and current_data:
+            predictions[category] = current_data
+        yield {'input_data': input_data, 'predictions': predictions}
+
+
+def sidecar_path(report_path) -> Path:
+    """
+    Path of the JSON Lines sidecar belonging to a .txt report
+    """
+    return Path(report_path).with_suffix(SIDECAR_SUFFIX)
+
+
+def write_report_sidecar(path, input_data: dict, predictions: dict):
+    """
+    Write one report as a JSON Lines sidecar, replacing any existing file
+    """
+    record = {'version': SIDECAR_VERSION, 'input_data': input_data, 'predictions': predictions}
+    with open(path, 'w') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+def _prediction_fields(data: dict) -> dict:
+    """
+    Prediction fields in the types the text parser produces: strings, and lists of strings
+
+    null fields and list items are left out, as the text parser leaves out missing ones.
+    """
+    fields = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        fields[key] = [str(item) for item in value if item is not None] if isinstance(value, list) else str(value)
+    return fields
+
+
+def read_report_sidecar(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Parse reports from the lines of a JSON Lines sidecar, one at a time
+
+    Category names are normalized the way the text parser derives them from
+    its "## Category" headings, so both sources produce the same keys. null
+    values are left out rather than turned into the string 'None'.
+
+    Yields:
+        dict: {'input_data': {...}, 'predictions': {...}} with raw predictions
+
+    Raises:
+        ValueError: On a malformed line or a sidecar version newer than SIDECAR_VERSION
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict) or record.get('version', SIDECAR_VERSION) > SIDECAR_VERSION:
+            raise ValueError(f"Unsupported report sidecar record on line {line_number}")
+        yield {
+            'input_data': {
+                str(key): str(value) for key, value in record.get('input_data', {}).items() if value is not None
+            },
+            'predictions': {
+                str(category).strip().lower().replace(' ', '_'): _prediction_fields(data)
+                for category, data in record.get('predictions', {}).items()
+                if isinstance(data, dict)
+            }
+        }
@@ -1,20 +1,36 @@
 import os
 import json
-from openai import OpenAI
+import re
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2 import sql
 import logging
 from datetime import datetime, timedelta
 import hashlib
-import pickle
 from pathlib import Path
 import glob
 import time
 from typing import List, Dict, Tuple, Optional
 import csv
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import chain, islice
 import pandas as pd
+from cache_keys import get_cache_key, get_legacy_cache_key
+from column_rules import COLUMN_RULES, InvalidRecordError, normalize_record
+from file_manifest import DUPLICATE, FAILED, LOADED, REJECTED, SAVED, FileManifest, Outcome, combine_outcomes, stat_signature
+from fuzzy_match import NGRAM_SIZE, TOKEN_MATCH_MIN_SCORE, FuzzyMatcher
+from gazetteer import ZipGazetteer
+from llm_gateway import chat_completion, gateway_stats, set_gateway_share
+from model_routing import RoutingTier
+from prediction_rules import normalize_prediction_values
+from report_parser import parse_reports, read_report_sidecar, sidecar_path
+from cache_store import (
+    CacheEntry, CacheRevalidator, CacheStore, CacheSweeper, MemoryCacheTier, SingleFlight, migrate_pickle_cache
+)
 
 # Load environment variables
 load_dotenv('.env.local')
@@ -33,103 +49,318 @@ logging.basicConfig(
 CACHE_DIR = Path('backend/cache')
 CACHE_DIR.mkdir(exist_ok=True)
 CACHE_EXPIRY_DAYS = 30  # Cache entries expire after 30 days
+CACHE_DB_PATH = CACHE_DIR / 'normalization_cache.db'
+CACHE_MEMORY_MAX_ENTRIES = 10000  # Entries kept in the in-process LRU tier
+CACHE_SWEEPER_ENABLED = True  # Incrementally remove expired entries in the background
+CACHE_SWEEP_INTERVAL_SECONDS = 60
+CACHE_SWEEP_BATCH_SIZE = 500  # Upper bound on entries removed per sweep
+# Outcome of every processed analysis file, so batch runs skip files that have not changed since
+MANIFEST_DB_PATH = CACHE_DIR / 'file_manifest.db'
+# Worker processes process_all_files prepares files with; 1 processes them one at a time in this process
+FILE_PROCESSING_WORKERS = 1
+# Reports a worker prepares per task; each worker has up to two tasks queued
+PREPARE_CHUNK_SIZE = 50
+# Reports whose values prefetch_normalizations resolves together, bounding its memory use
+PREFETCH_CHUNK_SIZE = 500
+# A RETURNING clause ending an INSERT; "returning" inside a quoted value does not match
+RETURNING_CLAUSE = re.compile(r"\bRETURNING\s+[\w\s,.*]+;?\s*$", re.IGNORECASE)
 
-class CacheEntry:
-    def __init__(self, normalized_value: str, confidence_score: float, timestamp: datetime):
-        self.normalized_value = normalized_value
-        self.confidence_score = confidence_score
-        self.timestamp = timestamp
-        self.approved_by = None
-        self.review_count = 0
-        self.last_reviewed = None
+# Normalization prompt and model. Cache entries are tagged with a fingerprint of
+# both so a prompt or model change can be detected per entry.
+NORMALIZATION_MODEL = "gpt-4"
+SMALL_NORMALIZATION_MODEL = "gpt-4o-mini"  # Tried first; see MODEL_TIERS
+NORMALIZATION_TEMPERATURE = 0.1  # Low temperature for consistent results
+NORMALIZATION_SYSTEM_PROMPT = "You are a data normalization expert. Return only the JSON response."
+NORMALIZATION_PROMPT_TEMPLATE = """
+    You are a data normalization expert. Your task is to either:
+    1. Match the input value to an existing value in the database, or
+    2. Create a new standardized value if no good match exists
+    
+    Column: {column_name}
+    Input value: {input_value}
+    Existing values in database: {existing_values}
+    
+    Rules:
+    1. If the input value is very similar to an existing value, use the existing value
+    2. If the input value is significantly different, create a new standardized value
+    3. For locations, use full city names (e.g., "washington dc" not "dc")
+    4. For occupations, use full job titles (e.g., "software developer" not "dev")
+    5. For gender, use standard terms ("male", "female", "non-binary", "other")
+    6. Always return a single string value
+    
+    Return your response in JSON format with two fields:
+    1. "normalized_value": the normalized value
+    2. "confidence_score": a number between 0 and 1 indicating your confidence in the match
+       - 1.0: Exact match to existing value
+       - 0.9: Very similar to existing value
+       - 0.7: Somewhat similar to existing value
+       - 0.5: New value with high confidence
+       - 0.3: New value with low confidence
+    """
 
-    def to_dict(self) -> dict:
-        return {
-            'normalized_value': self.normalized_value,
-            'confidence_score': self.confidence_score,
-            'timestamp': self.timestamp.isoformat(),
-            'approved_by': self.approved_by,
-            'review_count': self.review_count,
-            'last_reviewed': self.last_reviewed.isoformat() if self.last_reviewed else None
-        }
+BATCH_NORMALIZATION_PROMPT_TEMPLATE = """
+    You are a data normalization expert. For each item below, either:
+    1. Match the input value to one of the item's existing values in the database, or
+    2. Create a new standardized value if no good match exists
+    
+    Items (each with an id, a column, an input value and existing values of that column):
+    {items}
+    
+    Rules:
+    1. If the input value is very similar to an existing value, use the existing value
+    2. If the input value is significantly different, create a new standardized value
+    3. For locations, use full city names (e.g., "washington dc" not "dc")
+    4. For occupations, use full job titles (e.g., "software developer" not "dev")
+    5. For gender, use standard terms ("male", "female", "non-binary", "other")
+    6. Always return a single string value per item
+    
+    Return your response in JSON format as an object with a "results" list holding
+    one object per item with three fields:
+    1. "id": the id of the item
+    2. "normalized_value": the normalized value
+    3. "confidence_score": a number between 0 and 1 indicating your confidence in the match
+       - 1.0: Exact match to existing value
+       - 0.9: Very similar to existing value
+       - 0.7: Somewhat similar to existing value
+       - 0.5: New value with high confidence
+       - 0.3: New value with low confidence
+    """
 
-    @classmethod
-    def from_dict(cls, data: dict) -> 'CacheEntry':
-        entry = cls(
-            normalized_value=data['normalized_value'],
-            confidence_score=data['confidence_score'],
-            timestamp=datetime.fromisoformat(data['timestamp'])
-        )
-        entry.approved_by = data.get('approved_by')
-        entry.review_count = data.get('review_count', 0)
-        if data.get('last_reviewed'):
-            entry.last_reviewed = datetime.fromisoformat(data['last_reviewed'])
-        return entry
+def get_prompt_fingerprint(model: str, system_prompt: str, prompt_template: str, temperature: float) -> str:
+    """
+    Short stable hash identifying a prompt template and model configuration
+    """
+    material = json.dumps([model, system_prompt, prompt_template, temperature])
+    return hashlib.sha256(material.encode()).hexdigest()[:16]
 
-def cleanup_expired_cache():
+NORMALIZATION_FINGERPRINT = get_prompt_fingerprint(
+    NORMALIZATION_MODEL, NORMALIZATION_SYSTEM_PROMPT, NORMALIZATION_PROMPT_TEMPLATE, NORMALIZATION_TEMPERATURE
+)
+# Fingerprints of earlier prompt/model versions whose results are still acceptable as-is
+COMPATIBLE_NORMALIZATION_FINGERPRINTS = set()
+ACCEPT_UNVERSIONED_CACHE_ENTRIES = True  # Entries written before fingerprints existed
+# How lookups treat entries from incompatible versions:
+#   'lazy'   - serve the cached value and refresh it in the background
+#   'strict' - treat it as a miss and re-normalize on the spot
+#   'off'    - serve the cached value and never refresh it
+CACHE_REVALIDATION_MODE = 'lazy'
+
+# Failed GPT normalizations are remembered so the same bad value is not retried on every occurrence.
+# The n-th consecutive failure for a key suppresses retries for NEGATIVE_CACHE_TTL * 2**(n-1).
+NEGATIVE_CACHE_TTL = timedelta(minutes=15)
+NEGATIVE_CACHE_MAX_TTL = timedelta(hours=24)
+
+# Workers sharing CACHE_DB_PATH take a lease before calling GPT for a missing key; the others
+# wait for its result. A lease from a crashed worker expires after CACHE_LEASE_TTL.
+CACHE_LEASE_TTL = timedelta(minutes=5)
+CACHE_LEASE_POLL_SECONDS = 0.1
+
+# Inputs that closely match an existing value are resolved locally without calling GPT.
+# A match must score at least LOCAL_MATCH_MIN_SCORE and lead the runner-up by LOCAL_MATCH_MIN_MARGIN;
+# anything weaker or ambiguous is escalated to GPT.
+LOCAL_MATCH_ENABLED = True
+LOCAL_MATCH_MIN_SCORE = 0.8
+LOCAL_MATCH_MIN_MARGIN = 0.1
+AUTO_APPROVAL_THRESHOLD = 0.9  # Confidence at or above which results are used without asking the user
+
+# Columns with more distinct values than this only send GPT the most similar ones,
+# keeping the prompt size independent of the table size
+PROMPT_CANDIDATE_LIMIT = 50
+
+# Values that miss the cache are normalized together, this many per GPT request,
+# each shown with its BATCH_PROMPT_CANDIDATE_LIMIT most similar existing values
+BATCH_NORMALIZATION_MAX_ITEMS = 20
+BATCH_PROMPT_CANDIDATE_LIMIT = 15
+
+# Upper bound on GPT requests and database lookups in flight at once during normalization
+NORMALIZATION_CONCURRENCY = 8
+
+# Escalation policy for values the cache cannot resolve: local matching, then each
+# model tier in order. A tier's result is kept when its confidence reaches the column's
+# escalation threshold, otherwise the value moves on to the next tier; the last tier's
+# result is final. Costs are USD per 1K prompt/completion tokens, used for reporting.
+LOCAL_TIER = RoutingTier('local')
+MODEL_TIERS = [
+    RoutingTier('small', SMALL_NORMALIZATION_MODEL, input_cost_per_1k=0.00015, output_cost_per_1k=0.0006),
+    RoutingTier('large', NORMALIZATION_MODEL, input_cost_per_1k=0.03, output_cost_per_1k=0.06),
+]
+ESCALATION_THRESHOLDS = {
+    'location': AUTO_APPROVAL_THRESHOLD,
+    'occupation': AUTO_APPROVAL_THRESHOLD,
+}
+DEFAULT_ESCALATION_THRESHOLD = AUTO_APPROVAL_THRESHOLD
+
+def escalation_threshold(column_name: str) -> float:
+    return ESCALATION_THRESHOLDS.get(column_name, DEFAULT_ESCALATION_THRESHOLD)
+
+def tier_fingerprint(tier: RoutingTier, batch: bool = False) -> str:
     """
-    Remove expired cache entries
+    Fingerprint of results from a model tier, for single or batch requests
     """
-    expiry_date = datetime.now() - timedelta(days=CACHE_EXPIRY_DAYS)
-    for cache_file in CACHE_DIR.glob('*.pkl'):
-        try:
-            with open(cache_file, 'rb') as f:
-                entry = CacheEntry.from_dict(pickle.load(f))
-                if entry.timestamp < expiry_date:
-                    cache_file.unlink()
-                    logging.info(f"Removed expired cache entry: {cache_file}")
-        except Exception as e:
-            logging.warning(f"Error processing cache file {cache_file}: {e}")
+    template = BATCH_NORMALIZATION_PROMPT_TEMPLATE if batch else NORMALIZATION_PROMPT_TEMPLATE
+    return get_prompt_fingerprint(tier.model, NORMALIZATION_SYSTEM_PROMPT, template, NORMALIZATION_TEMPERATURE)
 
-def get_cache_key(input_value: str, column_name: str) -> str:
+# Local matches are tagged with a fingerprint of the matcher settings, so changing
+# them revalidates earlier matches like a prompt change does
+LOCAL_MATCH_FINGERPRINT = hashlib.sha256(json.dumps(
+    ['local_match', LOCAL_MATCH_MIN_SCORE, LOCAL_MATCH_MIN_MARGIN, NGRAM_SIZE, TOKEN_MATCH_MIN_SCORE]
+).encode()).hexdigest()[:16]
+
+# Results of every tier are current, so small-model answers are not revalidated
+CURRENT_NORMALIZATION_FINGERPRINTS = {
+    tier_fingerprint(tier, batch) for tier in MODEL_TIERS for batch in (False, True)
+} | {LOCAL_MATCH_FINGERPRINT}
+# approved_by values that do not mean the entry was approved; earlier versions stored local matches this way
+UNREVIEWED_APPROVAL_STATUSES = ('local_match',)
+
+memory_cache = MemoryCacheTier(max_entries=CACHE_MEMORY_MAX_ENTRIES, ttl=timedelta(days=CACHE_EXPIRY_DAYS))
+cache_store = CacheStore(CACHE_DB_PATH, memory_tier=memory_cache)
+# Cache keys being normalized by a thread of this process; a leader's result is
+# None when it produced none, and waiting callers then normalize the key themselves
+in_flight_normalizations = SingleFlight()
+file_manifest = FileManifest(MANIFEST_DB_PATH)
+cache_sweeper = CacheSweeper(
+    cache_store,
+    expiry=timedelta(days=CACHE_EXPIRY_DAYS),
+    interval_seconds=CACHE_SWEEP_INTERVAL_SECONDS,
+    batch_size=CACHE_SWEEP_BATCH_SIZE
+)
+
+def is_approved(entry: CacheEntry) -> bool:
+    return bool(entry.approved_by) and entry.approved_by not in UNREVIEWED_APPROVAL_STATUSES
+
+def is_compatible_entry(entry: CacheEntry) -> bool:
+    """
+    Check whether a cache entry was produced by a compatible prompt/model version
+    
+    Entries a person has approved or reviewed are always kept.
+    """
+    if is_approved(entry):
+        return True
+    if entry.fingerprint is None:
+        return ACCEPT_UNVERSIONED_CACHE_ENTRIES
+    if entry.fingerprint in CURRENT_NORMALIZATION_FINGERPRINTS:
+        return True
+    return entry.fingerprint in COMPATIBLE_NORMALIZATION_FINGERPRINTS
+
+def refresh_cache_entry(cache_key: str):
     """
-    Generate a cache key for a normalization request
+    Re-normalize a cache entry with the current prompt and model and store the result
     """
-    key = f"{column_name}:{input_value.lower().strip()}"
-    return hashlib.md5(key.encode()).hexdigest()
+    entry = cache_store.get(cache_key)
+    if not entry or is_compatible_entry(entry):
+        return
+    if entry.original_value is None or entry.column_name is None:
+        logging.info(f"Cannot revalidate {cache_key}: original value unknown")
+        return
+    normalized_value, confidence_score = request_gpt_normalization(
+        entry.original_value, entry.column_name, get_existing_values(entry.column_name)
+    )
+    save_to_cache(cache_key, normalized_value, confidence_score,
+                  column_name=entry.column_name, original_value=entry.original_value)
+    logging.info(f"Revalidated {entry.original_value}: {entry.normalized_value} -> {normalized_value}")
+
+cache_revalidator = CacheRevalidator(refresh_cache_entry)
+
+def cleanup_expired_cache():
+    """
+    Remove expired cache entries
+    """
+    expiry_date = datetime.now() - timedelta(days=CACHE_EXPIRY_DAYS)
+    try:
+        removed = cache_store.delete_expired(expiry_date)
+        removed_failures = cache_store.delete_expired_failures(expiry_date)
+        logging.info(f"Removed {removed} expired cache entries and {removed_failures} failure records")
+    except Exception as e:
+        logging.warning(f"Error cleaning up expired cache entries: {e}")
 
 def get_cached_value(cache_key: str) -> Optional[Tuple[str, float]]:
     """
     Get a cached normalization result
     """
-    cache_file = CACHE_DIR / f"{cache_key}.pkl"
-    if cache_file.exists():
-        try:
-            with open(cache_file, 'rb') as f:
-                entry = CacheEntry.from_dict(pickle.load(f))
-                if entry.timestamp > datetime.now() - timedelta(days=CACHE_EXPIRY_DAYS):
-                    logging.info(f"Cache hit for {cache_key} -> {entry.normalized_value}")
-                    return entry.normalized_value, entry.confidence_score
-                else:
-                    cache_file.unlink()
-                    logging.info(f"Removed expired cache entry: {cache_file}")
-        except Exception as e:
-            logging.warning(f"Error reading cache file {cache_file}: {e}")
+    try:
+        entry = cache_store.get(cache_key)
+        if entry:
+            if entry.timestamp > datetime.now() - timedelta(days=CACHE_EXPIRY_DAYS):
+                if not is_compatible_entry(entry):
+                    if CACHE_REVALIDATION_MODE == 'strict':
+                        logging.info(f"Ignoring cache entry {cache_key} from prompt version {entry.fingerprint}")
+                        return None
+                    if CACHE_REVALIDATION_MODE == 'lazy':
+                        cache_revalidator.enqueue(cache_key)
+                logging.info(f"Cache hit for {cache_key} -> {entry.normalized_value}")
+                return entry.normalized_value, entry.confidence_score
+            else:
+                cache_store.delete(cache_key)
+                logging.info(f"Removed expired cache entry: {cache_key}")
+    except Exception as e:
+        logging.warning(f"Error reading cache entry {cache_key}: {e}")
     return None
 
-def save_to_cache(cache_key: str, normalized_value: str, confidence_score: float, approved_by: Optional[str] = None):
+def save_to_cache(cache_key: str, normalized_value: str, confidence_score: float, approved_by: Optional[str] = None,
+                  column_name: Optional[str] = None, original_value: Optional[str] = None,
+                  fingerprint: Optional[str] = NORMALIZATION_FINGERPRINT):
     """
     Save a normalization result to cache
     """
-    cache_file = CACHE_DIR / f"{cache_key}.pkl"
     try:
-        entry = CacheEntry(normalized_value, confidence_score, datetime.now())
+        entry = CacheEntry(normalized_value, confidence_score, datetime.now(),
+                           column_name=column_name, original_value=original_value, fingerprint=fingerprint)
         if approved_by:
             entry.approved_by = approved_by
             entry.review_count += 1
             entry.last_reviewed = datetime.now()
-        with open(cache_file, 'wb') as f:
-            pickle.dump(entry.to_dict(), f)
+        cache_store.put(cache_key, entry)
     except Exception as e:
-        logging.warning(f"Error writing to cache file {cache_file}: {e}")
+        logging.warning(f"Error writing cache entry {cache_key}: {e}")
+
+def entry_precedence(entry: CacheEntry) -> tuple:
+    """
+    Sort key between entries competing for one cache key: approved or reviewed first, then newest
+    """
+    return is_approved(entry), entry.timestamp
+
+def promote_cache_entry(old_key: str, new_key: str, column_name: str, original_value: str):
+    """
+    Move an entry stored under a legacy key to its current key, keeping its version and review history
+    """
+    entry = cache_store.get(old_key)
+    if entry:
+        entry.column_name = column_name
+        entry.original_value = original_value
+        cache_store.put(new_key, entry)
+        cache_store.delete(old_key)
+
+class WorkerConnection:
+    """
+    The database connection of a file-processing worker, shared by all its lookups
+    
+    Runs in autocommit mode; close() leaves it open for the next caller.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def close(self):
+        pass
+
+# Set by init_file_worker in worker processes
+worker_connection: Optional[WorkerConnection] = None
 
 def get_db_connection():
     """
     Create a database connection using Supabase credentials
     
+    In a file-processing worker, the worker's own connection is returned instead.
+    
     Returns:
         psycopg2.connection: Database connection
     """
+    if worker_connection is not None:
+        return worker_connection
+    
     try:
         # Get Supabase connection details from environment variables
         supabase_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
@@ -274,298 +505,702 @@ def get_user_approval(input_value, normalized_value, confidence_score):
     
     return normalized_value
 
-def normalize_with_gpt(input_value, column_name, existing_values):
+def request_normalization_completion(prompt: str, tier: RoutingTier) -> str:
     """
-    Use GPT to normalize a value by either matching to existing values
-    or creating a new standardized value
+    Send a normalization prompt to a tier's model, recording latency and token usage
+    
+    Returns:
+        str: The response content
+    """
+    started = time.perf_counter()
+    response = None
+    try:
+        response = chat_completion(
+            model=tier.model,
+            messages=[
+                {"role": "system", "content": NORMALIZATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=NORMALIZATION_TEMPERATURE
+        )
+    finally:
+        tier.record_call(time.perf_counter() - started, getattr(response, 'usage', None))
+    return response.choices[0].message.content
+
+def request_gpt_normalization(input_value, column_name, existing_values, tier: Optional[RoutingTier] = None):
+    """
+    Ask GPT for a normalized value, bypassing the cache
     
     Args:
         input_value (str): The value to normalize
         column_name (str): The column name this value belongs to
         existing_values (list): List of existing values in the database
+        tier (RoutingTier): Model tier to ask, the last (largest) one by default
         
     Returns:
         tuple: (normalized_value, confidence_score)
+        
+    Raises:
+        Exception: If the response cannot be parsed
+    """
+    prompt = NORMALIZATION_PROMPT_TEMPLATE.format(
+        column_name=column_name,
+        input_value=input_value,
+        existing_values=json.dumps(prompt_candidates(input_value, column_name, existing_values), indent=2)
+    )
+    
+    result = json.loads(request_normalization_completion(prompt, tier or MODEL_TIERS[-1]))
+    return result['normalized_value'].strip(), float(result['confidence_score'])
+
+def request_gpt_batch_normalization(items: List[Tuple[str, str]], existing_values: Dict[str, List[str]],
+                                    tier: Optional[RoutingTier] = None) -> Dict[int, Tuple[str, float]]:
+    """
+    Ask GPT for normalized values of several (column_name, input_value) pairs in one request
+    
+    Args:
+        items (list): (column_name, input_value) pairs
+        existing_values (dict): Existing values per column name
+        tier (RoutingTier): Model tier to ask, the last (largest) one by default
+        
+    Returns:
+        dict: Position in items -> (normalized_value, confidence_score), for the items
+        the response answered well-formed; the others are left out
+        
+    Raises:
+        Exception: If the response as a whole cannot be parsed
+    """
+    payload = [
+        {
+            'id': item_id,
+            'column': column_name,
+            'input_value': input_value,
+            'existing_values': prompt_candidates(input_value, column_name, existing_values[column_name],
+                                                 BATCH_PROMPT_CANDIDATE_LIMIT)
+        }
+        for item_id, (column_name, input_value) in enumerate(items)
+    ]
+    prompt = BATCH_NORMALIZATION_PROMPT_TEMPLATE.format(items=json.dumps(payload, indent=2))
+    
+    results = {}
+    for result in json.loads(request_normalization_completion(prompt, tier or MODEL_TIERS[-1]))['results']:
+        try:
+            item_id = int(result['id'])
+            if 0 <= item_id < len(items):
+                results[item_id] = result['normalized_value'].strip(), float(result['confidence_score'])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Ignoring malformed batch result {result!r}: {e}")
+    return results
+
+local_matchers: Dict[str, FuzzyMatcher] = {}
+local_matchers_lock = threading.Lock()
+
+def get_local_matcher(column_name: str, existing_values: List[str]) -> FuzzyMatcher:
+    """
+    Matcher over a column's existing values
+
+    Values not seen by earlier calls are added to the index incrementally. Values are
+    never removed, since existing values only disappear from the table by manual cleanup.
+    """
+    with local_matchers_lock:
+        matcher = local_matchers.get(column_name)
+        if matcher is None:
+            matcher = FuzzyMatcher(column_name=column_name)
+            local_matchers[column_name] = matcher
+    matcher.add(existing_values)
+    return matcher
+
+def prompt_candidates(input_value, column_name, existing_values, limit: int = PROMPT_CANDIDATE_LIMIT) -> List[str]:
+    """
+    Existing values to show GPT: all of them for small columns, otherwise the limit most similar ones
+    """
+    if len(existing_values) <= limit:
+        return list(existing_values)
+    return get_local_matcher(column_name, existing_values).similar_values(input_value, limit)
+
+def local_match_confidence(score: float) -> float:
+    """
+    Map an accepted similarity score onto the confidence scale used for GPT results
+
+    LOCAL_MATCH_MIN_SCORE maps to AUTO_APPROVAL_THRESHOLD and an exact match to 1.0,
+    so every accepted local match is auto-approved and closer matches rank higher.
+    """
+    span = 1.0 - LOCAL_MATCH_MIN_SCORE
+    if span <= 0:
+        return 1.0
+    return AUTO_APPROVAL_THRESHOLD + (1.0 - AUTO_APPROVAL_THRESHOLD) * (score - LOCAL_MATCH_MIN_SCORE) / span
+
+def match_locally(input_value, column_name, existing_values) -> Optional[Tuple[str, float]]:
+    """
+    Resolve a value against existing values without GPT
+
+    Returns:
+        tuple: (normalized_value, confidence_score), or None to escalate to GPT
+    """
+    if not LOCAL_MATCH_ENABLED or not existing_values:
+        return None
+    started = time.perf_counter()
+    match = get_local_matcher(column_name, existing_values).match(
+        input_value, LOCAL_MATCH_MIN_SCORE, LOCAL_MATCH_MIN_MARGIN
+    )
+    LOCAL_TIER.record_call(time.perf_counter() - started)
+    if not match:
+        LOCAL_TIER.record_outcome(escalated=1)
+        return None
+    LOCAL_TIER.record_outcome(resolved=1)
+    normalized_value, score = match
+    return normalized_value, local_match_confidence(score)
+
+def resolve_without_gpt(input_value, column_name, existing_values, cache_key) -> Optional[Tuple[str, float]]:
+    """
+    Resolve a value from the cache or by local matching
+
+    Returns:
+        tuple: (normalized_value, confidence_score), or None if GPT is needed
     """
-    # Check cache first
-    cache_key = get_cache_key(input_value, column_name)
     cached_result = get_cached_value(cache_key)
+    if not cached_result:
+        # Entries written before key canonicalization are promoted to the current key on first use
+        legacy_key = get_legacy_cache_key(input_value, column_name)
+        cached_result = get_cached_value(legacy_key)
+        if cached_result:
+            promote_cache_entry(legacy_key, cache_key, column_name, input_value)
     if cached_result:
+        stats.cache_hits += 1
         logging.info(f"Cache hit for {input_value} -> {cached_result[0]}")
         return cached_result
     
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    local_result = match_locally(input_value, column_name, existing_values)
+    if local_result:
+        stats.local_hits += 1
+        logging.info(f"Local match for {input_value} -> {local_result[0]} (confidence: {local_result[1]:.2f})")
+        save_to_cache(cache_key, local_result[0], local_result[1], column_name=column_name,
+                      original_value=input_value, fingerprint=LOCAL_MATCH_FINGERPRINT)
+        return local_result
+    return None
+
+def accept_gpt_result(input_value, column_name, cache_key, normalized_value, confidence_score,
+                      fingerprint: str = NORMALIZATION_FINGERPRINT) -> Tuple[str, float]:
+    """
+    Confirm a GPT result with the user if needed, then cache it
+    """
+    # Log the normalization
+    logging.info(f"Normalized {input_value} -> {normalized_value} (confidence: {confidence_score:.2f})")
     
-    prompt = f"""
-    You are a data normalization expert. Your task is to either:
-    1. Match the input value to an existing value in the database, or
-    2. Create a new standardized value if no good match exists
+    # Get user approval if needed
+    if confidence_score < AUTO_APPROVAL_THRESHOLD:
+        normalized_value = get_user_approval(input_value, normalized_value, confidence_score)
+        logging.info(f"User approved normalization: {input_value} -> {normalized_value}")
     
-    Column: {column_name}
-    Input value: {input_value}
-    Existing values in database: {json.dumps(existing_values, indent=2)}
+    # Cache the result
+    save_to_cache(cache_key, normalized_value, confidence_score,
+                  column_name=column_name, original_value=input_value, fingerprint=fingerprint)
+    # New values become candidates for later inputs before they reach the table
+    get_local_matcher(column_name, [normalized_value])
     
-    Rules:
-    1. If the input value is very similar to an existing value, use the existing value
-    2. If the input value is significantly different, create a new standardized value
-    3. For locations, use full city names (e.g., "washington dc" not "dc")
-    4. For occupations, use full job titles (e.g., "software developer" not "dev")
-    5. For gender, use standard terms ("male", "female", "non-binary", "other")
-    6. Always return a single string value
+    return normalized_value, confidence_score
+
+def normalize_with_gpt(input_value, column_name, existing_values):
+    """
+    Use GPT to normalize a value by either matching to existing values
+    or creating a new standardized value
     
-    Return your response in JSON format with two fields:
-    1. "normalized_value": the normalized value
-    2. "confidence_score": a number between 0 and 1 indicating your confidence in the match
-       - 1.0: Exact match to existing value
-       - 0.9: Very similar to existing value
-       - 0.7: Somewhat similar to existing value
-       - 0.5: New value with high confidence
-       - 0.3: New value with low confidence
+    Args:
+        input_value (str): The value to normalize
+        column_name (str): The column name this value belongs to
+        existing_values (list): List of existing values in the database
+        
+    Returns:
+        tuple: (normalized_value, confidence_score)
     """
+    cache_key = get_cache_key(input_value, column_name)
+    cached_result = resolve_without_gpt(input_value, column_name, existing_values, cache_key)
+    if cached_result:
+        return cached_result
     
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a data normalization expert. Return only the JSON response."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.1  # Low temperature for consistent results
-    )
+    # Concurrent calls for the same key in this process share one computation
+    future, leader = in_flight_normalizations.begin(cache_key)
+    if not leader:
+        result = future.result()
+        if not result:
+            return normalize_with_gpt(input_value, column_name, existing_values)
+        stats.coalesced_hits += 1
+        logging.info(f"Coalesced {input_value} with an in-flight normalization -> {result[0]}")
+        return result
+    try:
+        result = normalize_with_lease(input_value, column_name, existing_values, cache_key)
+    except BaseException as e:
+        in_flight_normalizations.fail(cache_key, e)
+        raise
+    in_flight_normalizations.finish(cache_key, result)
+    return result
+
+def normalize_with_lease(input_value, column_name, existing_values, cache_key):
+    """
+    Normalize a value that missed the cache, unless another process is already doing so
+    """
+    # Only one worker computes a missing key; the others wait and read its result
+    cached_result = None
+    lease = None
+    while not cached_result:
+        lease = cache_store.acquire_lease(cache_key, CACHE_LEASE_TTL)
+        if lease:
+            # The previous holder may have saved its result after our cache miss
+            cached_result = get_cached_value(cache_key)
+            break
+        logging.info(f"Waiting for another worker to normalize {input_value}")
+        cache_store.wait_for_lease(cache_key, CACHE_LEASE_TTL.total_seconds(), CACHE_LEASE_POLL_SECONDS)
+        cached_result = get_cached_value(cache_key)
     
     try:
-        result = json.loads(response.choices[0].message.content)
-        normalized_value = result['normalized_value'].strip()
-        confidence_score = float(result['confidence_score'])
-        
-        # Log the normalization
-        logging.info(f"Normalized {input_value} -> {normalized_value} (confidence: {confidence_score:.2f})")
-        
-        # Get user approval if needed
-        if confidence_score < 0.9:
-            normalized_value = get_user_approval(input_value, normalized_value, confidence_score)
-            logging.info(f"User approved normalization: {input_value} -> {normalized_value}")
-        
-        # Cache the result
-        save_to_cache(cache_key, normalized_value, confidence_score)
-        
-        return normalized_value, confidence_score
-    except Exception as e:
+        if cached_result:
+            stats.cache_hits += 1
+            logging.info(f"Cache hit for {input_value} -> {cached_result[0]}")
+            return cached_result
+        return compute_normalization(input_value, column_name, existing_values, cache_key)
+    finally:
+        if lease:
+            cache_store.release_lease(cache_key, lease)
+
+def compute_normalization(input_value, column_name, existing_values, cache_key):
+    """
+    Normalize a value that missed the cache; the caller holds the key's lease
+    """
+    # Known-failing inputs short-circuit until their backoff period has passed
+    failure = cache_store.get_failure(cache_key)
+    if failure and failure.is_active():
+        stats.negative_cache_hits += 1
+        logging.info(f"Skipping {input_value}: failed {failure.failure_count} times, retry after {failure.retry_after}")
+        return input_value, 0.0
+    
+    try:
+        normalized_value, confidence_score, tier = request_routed_normalization(input_value, column_name, existing_values)
+        if failure:
+            cache_store.clear_failure(cache_key)
+        return accept_gpt_result(input_value, column_name, cache_key, normalized_value, confidence_score,
+                                 fingerprint=tier_fingerprint(tier))
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
         logging.error(f"Error parsing GPT response: {e}")
+        stats.gpt_failures += 1
+        failure = cache_store.record_failure(
+            cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MAX_TTL,
+            column_name=column_name, original_value=input_value, error=str(e)
+        )
+        logging.info(f"Suppressing retries for {input_value} until {failure.retry_after}")
         return input_value, 0.0
 
-def normalize_data(data):
+def request_routed_normalization(input_value, column_name, existing_values) -> Tuple[str, float, RoutingTier]:
     """
-    Normalize all input data using GPT to match existing values or create new ones
+    Ask each model tier in turn until one is confident enough for the column
+    
+    A tier that fails is skipped, unless it is the last one.
+    
+    Returns:
+        tuple: (normalized_value, confidence_score, tier that answered)
+        
+    Raises:
+        Exception: If the last tier's response cannot be parsed
+    """
+    threshold = escalation_threshold(column_name)
+    for tier in MODEL_TIERS:
+        final = tier is MODEL_TIERS[-1]
+        stats.gpt_calls += 1
+        try:
+            normalized_value, confidence_score = request_gpt_normalization(input_value, column_name, existing_values, tier)
+        except Exception as e:
+            tier.record_outcome(failed=1)
+            if final:
+                raise
+            logging.warning(f"{tier.name} tier failed for {input_value}, escalating: {e}")
+            continue
+        if final or confidence_score >= threshold:
+            tier.record_outcome(resolved=1)
+            return normalized_value, confidence_score, tier
+        tier.record_outcome(escalated=1)
+        logging.info(f"Escalating {input_value}: {tier.name} tier confidence {confidence_score:.2f} "
+                     f"is below {threshold:.2f}")
+
+def request_batch_results(items: List[Tuple[str, str]],
+                          existing_values: Dict[str, List[str]]) -> Dict[int, Tuple[str, float, str]]:
+    """
+    Tiered request_gpt_batch_normalization: each tier is asked for the items the
+    previous tiers did not answer confidently enough; an unparsable response counts
+    as no results
+    
+    Returns:
+        dict: Position in items -> (normalized_value, confidence_score, fingerprint)
+    """
+    results = {}
+    remaining = list(range(len(items)))
+    for tier in MODEL_TIERS:
+        final = tier is MODEL_TIERS[-1]
+        stats.gpt_calls += 1
+        try:
+            batch_results = request_gpt_batch_normalization([items[item_id] for item_id in remaining],
+                                                            existing_values, tier)
+        except Exception as e:
+            if final and not isinstance(e, (ValueError, KeyError, TypeError, AttributeError)):
+                raise
+            logging.error(f"Error in {tier.name} tier batch response: {e}")
+            batch_results = {}
+        escalated = []
+        for position, item_id in enumerate(remaining):
+            result = batch_results.get(position)
+            if result and (final or result[1] >= escalation_threshold(items[item_id][0])):
+                results[item_id] = (*result, tier_fingerprint(tier, batch=True))
+            else:
+                escalated.append(item_id)
+        answered = sum(1 for item_id in remaining if item_id in results)
+        tier.record_outcome(resolved=answered, escalated=len(escalated) if not final else 0,
+                            failed=len(escalated) if final else 0)
+        remaining = escalated
+        if not remaining:
+            break
+    return results
+
+async def normalize_batch_async(items: List[Tuple[str, str]],
+                                existing_values: Optional[Dict[str, List[str]]] = None,
+                                concurrency: int = NORMALIZATION_CONCURRENCY) -> Dict[Tuple[str, str], Tuple[str, float]]:
+    """
+    Normalize many values with as few GPT requests as possible, running them concurrently
+    
+    Values are resolved from the cache or by local matching where possible. The
+    rest are sent to GPT BATCH_NORMALIZATION_MAX_ITEMS at a time, and each result
+    is cached under its own key. Values another worker is already normalizing,
+    and values a batch response did not answer or whose batch request failed,
+    go through normalize_with_gpt.
+    Existing-value lookups, batch requests and fallbacks each run concurrently,
+    at most concurrency at a time, in worker threads.
     
     Args:
-        data (dict): Raw input data
+        items (list): (column_name, input_value) pairs, possibly repeated
+        existing_values (dict): Existing values per column name, fetched when missing
+        concurrency (int): Maximum number of blocking calls in flight
         
     Returns:
-        dict: Normalized data
+        dict: (column_name, input_value) -> (normalized_value, confidence_score)
     """
-    normalized = data.copy()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_bounded(func, *args):
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+    
+    existing_values = dict(existing_values or {})
+    missing_columns = sorted({column_name for column_name, _ in items} - set(existing_values))
+    fetched = await asyncio.gather(*(run_bounded(get_existing_values, column_name) for column_name in missing_columns))
+    existing_values.update(zip(missing_columns, fetched))
+    
+    results = {}
+    misses = {}  # cache_key -> (column_name, input_value) pairs sharing the key
+    for column_name, input_value in items:
+        if (column_name, input_value) in results:
+            continue
+        cache_key = get_cache_key(input_value, column_name)
+        if cache_key in misses:
+            misses[cache_key].append((column_name, input_value))
+            continue
+        result = resolve_without_gpt(input_value, column_name, existing_values[column_name], cache_key)
+        if result:
+            results[(column_name, input_value)] = result
+        else:
+            misses[cache_key] = [(column_name, input_value)]
     
-    # Get existing values for each column
-    existing_locations = get_existing_values('location')
-    existing_occupations = get_existing_values('occupation')
-    existing_genders = get_existing_values('gender')
+    leases = {}
+    try:
+        pending = []
+        for cache_key, pairs in misses.items():
+            failure = cache_store.get_failure(cache_key)
+            if failure and failure.is_active():
+                stats.negative_cache_hits += 1
+                for pair in pairs:
+                    results[pair] = pair[1], 0.0
+                continue
+            # Keys another thread is normalizing are left to normalize_with_gpt, which joins it
+            _, leader = in_flight_normalizations.begin(cache_key)
+            if not leader:
+                continue
+            try:
+                lease = cache_store.acquire_lease(cache_key, CACHE_LEASE_TTL)
+            except Exception as e:
+                # Release waiters on the key; it falls back to normalize_with_gpt below
+                logging.warning(f"Could not acquire the lease on {cache_key}: {e}")
+                lease = None
+            if lease:
+                leases[cache_key] = lease
+                pending.append(cache_key)
+            else:
+                in_flight_normalizations.finish(cache_key, None)
+        
+        chunks = [pending[start:start + BATCH_NORMALIZATION_MAX_ITEMS]
+                  for start in range(0, len(pending), BATCH_NORMALIZATION_MAX_ITEMS)]
+        chunk_results = await asyncio.gather(*(
+            run_bounded(request_batch_results, [misses[cache_key][0] for cache_key in chunk], existing_values)
+            for chunk in chunks
+        ), return_exceptions=True)
+        for chunk, batch_results in zip(chunks, chunk_results):
+            if isinstance(batch_results, BaseException):
+                # The chunk's values fall back to normalize_with_gpt below
+                logging.warning(f"Batch normalization request for {len(chunk)} values failed: {batch_results}")
+                continue
+            for item_id, cache_key in enumerate(chunk):
+                if item_id not in batch_results:
+                    continue
+                column_name, input_value = misses[cache_key][0]
+                cache_store.clear_failure(cache_key)
+                normalized_value, confidence_score, fingerprint = batch_results[item_id]
+                result = accept_gpt_result(input_value, column_name, cache_key, normalized_value, confidence_score,
+                                           fingerprint=fingerprint)
+                for pair in misses[cache_key]:
+                    results[pair] = result
+    finally:
+        for cache_key, lease in leases.items():
+            cache_store.release_lease(cache_key, lease)
+            in_flight_normalizations.finish(cache_key, results.get(misses[cache_key][0]))
+    
+    leftovers = [pair for pairs in misses.values() for pair in pairs if pair not in results]
+    fallback_results = await asyncio.gather(*(
+        run_bounded(normalize_with_gpt, input_value, column_name, existing_values[column_name])
+        for column_name, input_value in leftovers
+    ))
+    results.update(zip(leftovers, fallback_results))
+    return results
+
+def normalize_batch(items: List[Tuple[str, str]],
+                    existing_values: Optional[Dict[str, List[str]]] = None) -> Dict[Tuple[str, str], Tuple[str, float]]:
+    """
+    Synchronous wrapper around normalize_batch_async
+    """
+    return asyncio.run(normalize_batch_async(items, existing_values))
+
+# Input columns normalized and validated in-process by rules derived from the table's CHECK constraints
+LOCAL_RULE_COLUMNS = ('age', 'zip_code', 'gender')
+# Input columns normalized against existing values, unless a local rule covers them
+INPUT_NORMALIZATION_COLUMNS = tuple(
+    column_name for column_name in ('location', 'occupation', 'gender') if column_name not in COLUMN_RULES
+)
+
+def apply_column_rules(data):
+    """
+    Copy of data with its constrained input columns normalized locally
     
-    # Normalize input data
-    if 'location' in normalized['input_data']:
-        normalized['input_data']['location'], _ = normalize_with_gpt(
-            normalized['input_data']['location'],
-            'location',
-            existing_locations
-        )
+    Raises:
+        InvalidRecordError: If the record can never satisfy the table's constraints
+    """
+    checked = data.copy()
+    checked['input_data'] = normalize_record(data['input_data'], LOCAL_RULE_COLUMNS)
+    return checked
+
+# Resolve locations from their ZIP codes with the bundled offline gazetteer before normalizing them
+GAZETTEER_ENABLED = True
+zip_gazetteer = ZipGazetteer.load() if GAZETTEER_ENABLED else None
+
+def resolve_location_from_zip(data, record: bool = True):
+    """
+    Copy of data with its location resolved from its ZIP code, where the two agree
     
-    if 'occupation' in normalized['input_data']:
-        normalized['input_data']['occupation'], _ = normalize_with_gpt(
-            normalized['input_data']['occupation'],
-            'occupation',
-            existing_occupations
-        )
+    The location is replaced by the gazetteer's place only when it names that city
+    or the ZIP code has its own entry; a location that only names the right state,
+    e.g. "Towson, MD" with a Baltimore prefix, keeps its text. A location that names
+    a place outside its ZIP code's state keeps its text and is flagged under
+    'location_mismatch'. Either way the location is then normalized against the
+    existing values as usual, so "Washington, DC" is stored in the table's form.
     
-    if 'gender' in normalized['input_data']:
-        normalized['input_data']['gender'], _ = normalize_with_gpt(
-            normalized['input_data']['gender'],
-            'gender',
-            existing_genders
-        )
+    Args:
+        data (dict): Data that has passed apply_column_rules
+        record (bool): Whether to log and count the outcome; False when prefetching
+    """
+    if zip_gazetteer is None:
+        return data
+    input_data = data['input_data']
+    location, zip_code = input_data.get('location'), input_data.get('zip_code')
+    if not location or not zip_code:
+        return data
+    check = zip_gazetteer.check(location, zip_code)
+    if check is None or check.agrees is None:
+        return data
+    resolved = data.copy()
+    if check.agrees and not (check.place.city and (check.names_city or check.exact)):
+        if record:
+            stats.location_validations += 1
+            logging.info(f"Gazetteer validated the state of {location} ({zip_code})")
+    elif check.agrees:
+        resolved['input_data'] = {**input_data, 'location': check.place.label}
+        if record:
+            stats.gazetteer_hits += 1
+            logging.info(f"Gazetteer resolved {location} ({zip_code}) -> {check.place.label}")
+    else:
+        resolved['location_mismatch'] = {
+            'location': location, 'zip_code': zip_code,
+            'zip_location': check.place.label, 'mentioned': check.mentioned,
+        }
+        if record:
+            stats.location_mismatches += 1
+            logging.warning(f"Location {location!r} names {check.mentioned!r}, but ZIP code {zip_code} "
+                            f"is in {check.place.label}")
+    return resolved
+
+def prediction_column(category: str) -> Optional[str]:
+    """
+    Column whose values a prediction category is normalized against, if any
+    """
+    if 'location' in category or 'geolocation' in category:
+        return 'location'
+    if 'employment' in category or 'occupation' in category:
+        return 'occupation'
+    return None
+
+def collect_normalization_items(data) -> List[Tuple[str, str]]:
+    """
+    (column_name, input_value) pairs normalize_data resolves for one parsed file
+    """
+    items = [
+        (column_name, data['input_data'][column_name])
+        for column_name in INPUT_NORMALIZATION_COLUMNS
+        if column_name in data['input_data']
+    ]
+    for category, prediction in data['predictions'].items():
+        column_name = prediction_column(category)
+        if column_name and 'prediction' in prediction:
+            items.append((column_name, prediction['prediction']))
+    return items
+
+def iter_analysis_records(filepaths):
+    """
+    The reports of several demographic files in order, leaving out what fails to parse
+    
+    Yields:
+        dict: Parsed demographic data, see iter_demographic_records
+    """
+    for filepath in filepaths:
+        try:
+            yield from iter_demographic_records(filepath)
+        except Exception as e:
+            logging.warning(f"Could not parse {filepath} for prefetching: {e}")
+
+def prefetch_normalizations(datasets, chunk_size: int = PREFETCH_CHUNK_SIZE):
+    """
+    Normalize the values of several parsed files together so normalize_data
+    finds them in the cache; LLM requests are shared across files
+    
+    Records are taken chunk_size at a time, so any number of them is prefetched
+    in bounded memory. Records that fail the column rules are left out;
+    normalize_data rejects them later. Prefetching is only an optimization: if
+    it fails, e.g. because the LLM cannot be reached, a warning is logged and
+    each file normalizes and reports errors on its own.
+    """
+    datasets = iter(datasets)
+    while True:
+        chunk = list(islice(datasets, chunk_size))
+        if not chunk:
+            break
+        valid = []
+        for data in chunk:
+            try:
+                valid.append(resolve_location_from_zip(apply_column_rules(data), record=False))
+            except InvalidRecordError:
+                continue
+        items = [item for data in valid for item in collect_normalization_items(data)]
+        if not items:
+            continue
+        try:
+            normalize_batch(items)
+        except Exception as e:
+            logging.warning(f"Could not prefetch normalizations, normalizing file by file: {e}")
+            return
+
+def apply_normalizations(data, results: Dict[Tuple[str, str], Tuple[str, float]]):
+    """
+    Copy of data with its values replaced by their normalized forms from results
+    """
+    normalized = data.copy()
+    
+    # Normalize input data
+    for column_name in INPUT_NORMALIZATION_COLUMNS:
+        if column_name in normalized['input_data']:
+            value = normalized['input_data'][column_name]
+            normalized['input_data'][column_name] = results[(column_name, value)][0]
     
     # Normalize predictions
     for category, prediction in normalized['predictions'].items():
-        if 'prediction' in prediction:
-            # Normalize location in predictions
-            if 'location' in category or 'geolocation' in category:
-                prediction['prediction'], _ = normalize_with_gpt(
-                    prediction['prediction'],
-                    'location',
-                    existing_locations
-                )
-            
-            # Normalize occupation in predictions
-            if 'employment' in category or 'occupation' in category:
-                prediction['prediction'], _ = normalize_with_gpt(
-                    prediction['prediction'],
-                    'occupation',
-                    existing_occupations
-                )
+        column_name = prediction_column(category)
+        if column_name and 'prediction' in prediction:
+            prediction['prediction'] = results[(column_name, prediction['prediction'])][0]
     
     return normalized
 
-def validate_confidence_level(confidence: str) -> str:
+async def normalize_records_async(datasets: List[dict]) -> List[dict]:
     """
-    Validate and standardize confidence levels
+    Normalize several parsed files concurrently
+    
+    The values of all records are resolved together by one normalize_batch_async
+    call, so records share GPT requests and no two tasks ever wait on each other
+    for the same key. Column rules are checked first, so an invalid record costs
+    no LLM or database work. Locations are then resolved from their ZIP codes
+    where possible.
     
     Args:
-        confidence (str): Raw confidence level
+        datasets (list): Raw input data, one dict per file
         
     Returns:
-        str: Standardized confidence level
+        list: Normalized data, in the order of datasets
+        
+    Raises:
+        InvalidRecordError: If any record can never satisfy the table's constraints
     """
-    # Define valid confidence levels and their variations
-    confidence_levels = {
-        'high': ['high', 'very high', 'very high confidence', 'high confidence', 'strong', 'strong confidence'],
-        'medium': ['medium', 'moderate', 'moderate confidence', 'medium confidence', 'average', 'average confidence'],
-        'low': ['low', 'very low', 'very low confidence', 'low confidence', 'weak', 'weak confidence']
-    }
-    
-    # Convert to lowercase and strip whitespace
-    confidence = confidence.lower().strip()
-    
-    # Check for numeric confidence scores (0-1 range)
     try:
-        score = float(confidence)
-        if 0 <= score <= 1:
-            if score >= 0.8:
-                return 'High'
-            elif score >= 0.5:
-                return 'Medium'
-            else:
-                return 'Low'
-    except ValueError:
-        pass
-    
-    # Check against known variations
-    for standard_level, variations in confidence_levels.items():
-        if confidence in variations:
-            return standard_level.capitalize()
-    
-    # If no match found, return Medium as default
-    logging.warning(f"Invalid confidence level '{confidence}' - defaulting to Medium")
-    return 'Medium'
+        datasets = [apply_column_rules(data) for data in datasets]
+    except InvalidRecordError:
+        stats.rejected_records += 1
+        raise
+    datasets = [resolve_location_from_zip(data) for data in datasets]
+    items = [item for data in datasets for item in collect_normalization_items(data)]
+    results = await normalize_batch_async(items)
+    return [apply_normalizations(data, results) for data in datasets]
+
+async def normalize_data_async(data):
+    """
+    Normalize one parsed file, running its lookups and GPT requests concurrently
+    """
+    return (await normalize_records_async([data]))[0]
 
-def normalize_prediction_values(predictions):
+def normalize_data(data):
     """
-    Normalize prediction values to ensure consistency across all rows
+    Normalize all input data using GPT to match existing values or create new ones
+    
+    Synchronous wrapper around normalize_data_async.
     
     Args:
-        predictions (dict): Raw predictions from the LLM
+        data (dict): Raw input data
         
     Returns:
-        dict: Normalized predictions with consistent formatting
-    """
-    normalized = {}
-    
-    # Define standard formats for each category
-    standard_formats = {
-        "employment_type": {
-            "patterns": {
-                r"full[-\s]?time": "Full-time",
-                r"part[-\s]?time": "Part-time",
-                r"contract": "Contract",
-                r"freelance": "Freelance",
-                r"self[-\s]?employed": "Self-employed"
-            },
-            "default": "Full-time"
-        },
-        "income_bracket": {
-            "patterns": {
-                r"\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)": lambda m: f"${m.group(1)} - ${m.group(2)}",
-                r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)": lambda m: f"${m.group(1)} - ${m.group(2)}"
-            },
-            "default": "Not specified"
-        },
-        "education_level": {
-            "patterns": {
-                r"bachelor['']?s": "Bachelor's degree",
-                r"master['']?s": "Master's degree",
-                r"ph\.?d": "PhD",
-                r"associate['']?s": "Associate's degree",
-                r"high school": "High school diploma"
-            },
-            "default": "Not specified"
-        },
-        "housing_status": {
-            "patterns": {
-                r"rent(?:ing|ed)?": "Renting",
-                r"own(?:ing|ed)?": "Owning",
-                r"mortgage": "Mortgage",
-                r"apartment": "Apartment",
-                r"house": "House"
-            },
-            "default": "Not specified"
-        },
-        "work_schedule_type": {
-            "patterns": {
-                r"9[-\s]?5": "9-5",
-                r"flexible": "Flexible",
-                r"shift": "Shift work",
-                r"remote": "Remote",
-                r"hybrid": "Hybrid"
-            },
-            "default": "Not specified"
-        }
-    }
+        dict: Normalized data
+    """
+    return asyncio.run(normalize_data_async(data))
+
+def iter_demographic_records(filepath):
+    """
+    Parse the reports of a demographic analysis file one at a time
     
-    import re
+    Reports are read from the file's JSON Lines sidecar when questions_backend
+    wrote one, keeping the confidence and variations of each prediction; legacy
+    files without a sidecar are parsed from the text. Either way the file is
+    streamed line by line, so exports holding any number of concatenated
+    reports are read in constant memory.
     
-    for category, data in predictions.items():
-        normalized[category] = data.copy()
-        
-        # Get the prediction value
-        prediction = data.get('prediction', '')
-        
-        # Check if we have a standard format for this category
-        if category in standard_formats:
-            format_rules = standard_formats[category]
-            
-            # Try to match against known patterns
-            matched = False
-            for pattern, replacement in format_rules['patterns'].items():
-                if isinstance(replacement, str):
-                    if re.search(pattern, prediction, re.IGNORECASE):
-                        normalized[category]['prediction'] = replacement
-                        matched = True
-                        break
-                else:
-                    # Handle lambda functions for complex replacements
-                    match = re.search(pattern, prediction)
-                    if match:
-                        normalized[category]['prediction'] = replacement(match)
-                        matched = True
-                        break
-            
-            # If no match found, use default
-            if not matched:
-                normalized[category]['prediction'] = format_rules['default']
-        
-        # Normalize confidence levels
-        if 'confidence' in data:
-            normalized[category]['confidence'] = validate_confidence_level(data['confidence'])
-        else:
-            normalized[category]['confidence'] = 'Medium'  # Default confidence level
+    Args:
+        filepath (str): Path to the demographic analysis .txt file
         
-        # Normalize sources to include year
-        if 'sources' in data:
-            sources = []
-            for source in data['sources']:
-                if not re.search(r'\d{4}', source):
-                    source = f"{source} (2024)"
-                sources.append(source)
-            normalized[category]['sources'] = sources
-    
-    return normalized
+    Yields:
+        dict: Parsed demographic data, predictions normalized
+    """
+    sidecar = sidecar_path(filepath)
+    source, parse = (sidecar, read_report_sidecar) if sidecar.exists() else (filepath, parse_reports)
+    with open(source, 'r') as f:
+        for record in parse(f):
+            yield {
+                'input_data': record['input_data'],
+                'predictions': normalize_prediction_values(record['predictions'])
+            }
 
 def read_demographic_file(filepath):
     """
@@ -576,53 +1211,17 @@ def read_demographic_file(filepath):
         
     Returns:
         dict: Parsed demographic data
+        
+    Raises:
+        ValueError: If the file holds no report, or several (see iter_demographic_records)
     """
-    with open(filepath, 'r') as f:
-        content = f.read()
-    
-    # Split content into input data and predictions
-    sections = content.split('=' * 30)
-    input_section = sections[1].strip()
-    predictions_section = sections[2].strip() if len(sections) > 2 else ""
-    
-    # Parse input data
-    input_data = {}
-    for line in input_section.split('\n'):
-        if ':' in line:
-            key, value = line.split(':', 1)
-            input_data[key.strip()] = value.strip()
-    
-    # Parse predictions
-    predictions = {}
-    current_category = None
-    current_data = {}
-    
-    for line in predictions_section.split('\n'):
-        line = line.strip()
-        if line.startswith('## '):
-            if current_category and current_data:
-                predictions[current_category] = current_data
-            current_category = line[3:].lower().replace(' ', '_')
-            current_data = {}
-        elif line.startswith('Prediction: '):
-            current_data['prediction'] = line[11:].strip()
-        elif line.startswith('Explanation: '):
-            current_data['explanation'] = line[12:].strip()
-        elif line.startswith('- '):
-            if 'sources' not in current_data:
-                current_data['sources'] = []
-            current_data['sources'].append(line[2:].strip())
-    
-    if current_category and current_data:
-        predictions[current_category] = current_data
-    
-    # Normalize the predictions
-    normalized_predictions = normalize_prediction_values(predictions)
-    
-    return {
-        'input_data': input_data,
-        'predictions': normalized_predictions
-    }
+    records = iter_demographic_records(filepath)
+    data = next(records, None)
+    if data is None:
+        raise ValueError(f"No demographic analysis report found in {filepath}")
+    if next(records, None) is not None:
+        raise ValueError(f"{filepath} holds several reports; read it with iter_demographic_records")
+    return data
 
 def generate_sql(data):
     """
@@ -634,8 +1233,6 @@ def generate_sql(data):
     Returns:
         str: SQL insert statements
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
     # Format the data for the prompt
     prompt = f"""
     Generate SQL INSERT statements for the following demographic data.
@@ -748,7 +1345,7 @@ def generate_sql(data):
          * "Will accumulate $45,000-$55,000 in retirement savings within 3 years, with 60% probability of carrying $20,000-$30,000 in student debt" -> "$45-55K savings, $20-30K debt"
     """
     
-    response = client.chat.completions.create(
+    response = chat_completion(
         model="gpt-4",
         messages=[
             {"role": "system", "content": """You are a SQL expert. Generate clean, well-formatted SQL INSERT statements for an existing table.
@@ -770,16 +1367,25 @@ def generate_sql(data):
     
     return response.choices[0].message.content
 
-def save_sql(sql_content, original_filepath):
+def save_sql(sql_content, original_filepath, report: Optional[int] = None):
     """
     Save the SQL statements to a file and execute them against the database
     
     Args:
         sql_content (str): SQL statements
         original_filepath (str): Path to the original demographic file
+        report (int): Number of the report within a file holding several, appended to the SQL filename
+        
+    Returns:
+        tuple: (SQL file path, id of the inserted row or None if the SQL was not executed)
+    
+    Raises:
+        RuntimeError: If the INSERT ran but returned no row id; nothing is committed
     """
     # Create SQL filename based on original filename
     base_name = os.path.splitext(os.path.basename(original_filepath))[0]
+    if report is not None:
+        base_name = f"{base_name}_{report}"
     sql_filepath = os.path.join('backend', f"{base_name}.sql")
     
     # Clean the SQL content
@@ -801,7 +1407,12 @@ def save_sql(sql_content, original_filepath):
     conn = get_db_connection()
     if not conn:
         print("Error: Could not connect to database. SQL statements were saved but not executed.")
-        return sql_filepath
+        return sql_filepath, None
+    
+    # Have the INSERT report the id of the row it creates
+    if not RETURNING_CLAUSE.search(sql_content):
+        sql_content = sql_content.rstrip().rstrip(';') + ' RETURNING id;'
+    row_id = None
     
     try:
         with conn.cursor() as cur:
@@ -883,6 +1494,10 @@ def save_sql(sql_content, original_filepath):
             # Execute the cleaned SQL
             print(f"Executing SQL: {sql_content.strip()}")
             cur.execute(sql_content)
+            row = cur.fetchone() if cur.description else None
+            if row is None:
+                raise RuntimeError(f"INSERT did not return the id of the inserted row: {sql_content.strip()}")
+            row_id = row[0]
             
             conn.commit()
             print("Successfully executed SQL statements against the database.")
@@ -892,20 +1507,29 @@ def save_sql(sql_content, original_filepath):
             count = cur.fetchone()[0]
             print(f"Current number of records in table: {count}")
             
-    except Exception as e:
+    except psycopg2.Error as e:
         print(f"Error executing SQL statements: {e}")
         print("SQL statements were saved but not executed.")
         conn.rollback()
+        row_id = None
     finally:
         conn.close()
     
-    return sql_filepath
+    return sql_filepath, row_id
 
 class NormalizationStats:
     def __init__(self):
         self.total_normalizations = 0
         self.cache_hits = 0
+        self.local_hits = 0
+        self.negative_cache_hits = 0
+        self.coalesced_hits = 0
+        self.rejected_records = 0
+        self.gazetteer_hits = 0
+        self.location_mismatches = 0
+        self.location_validations = 0
         self.gpt_calls = 0
+        self.gpt_failures = 0
         self.auto_approvals = 0
         self.manual_approvals = 0
         self.rejections = 0
@@ -938,7 +1562,15 @@ class NormalizationStats:
         return {
             'total_normalizations': self.total_normalizations,
             'cache_hits': self.cache_hits,
+            'local_hits': self.local_hits,
+            'negative_cache_hits': self.negative_cache_hits,
+            'coalesced_hits': self.coalesced_hits,
+            'rejected_records': self.rejected_records,
+            'gazetteer_hits': self.gazetteer_hits,
+            'location_mismatches': self.location_mismatches,
+            'location_validations': self.location_validations,
             'gpt_calls': self.gpt_calls,
+            'gpt_failures': self.gpt_failures,
             'auto_approvals': self.auto_approvals,
             'manual_approvals': self.manual_approvals,
             'rejections': self.rejections,
@@ -957,66 +1589,187 @@ class NormalizationStats:
 # Global stats object
 stats = NormalizationStats()
 
+CACHE_EXPORT_FIELDS = [
+    'cache_key', 'column_name', 'original_value', 'normalized_value', 'confidence_score',
+    'timestamp', 'approved_by', 'review_count', 'last_reviewed', 'fingerprint'
+]
+
 def export_cache_to_csv(filename: str = 'backend/cache_export.csv'):
     """
-    Export cache entries to a CSV file
+    Export cache entries to a CSV file, streaming rows straight from the cache store
     """
-    entries = []
-    for cache_file in CACHE_DIR.glob('*.pkl'):
-        try:
-            with open(cache_file, 'rb') as f:
-                entry = CacheEntry.from_dict(pickle.load(f))
-                key_parts = cache_file.stem.split(':')
-                entries.append({
-                    'column_name': key_parts[0],
-                    'original_value': key_parts[1],
-                    'normalized_value': entry.normalized_value,
-                    'confidence_score': entry.confidence_score,
-                    'timestamp': entry.timestamp.isoformat(),
-                    'approved_by': entry.approved_by,
-                    'review_count': entry.review_count,
-                    'last_reviewed': entry.last_reviewed.isoformat() if entry.last_reviewed else None
-                })
-        except Exception as e:
-            logging.warning(f"Error reading cache file {cache_file}: {e}")
-    
-    if entries:
-        df = pd.DataFrame(entries)
-        df.to_csv(filename, index=False)
-        print(f"Exported {len(entries)} cache entries to {filename}")
+    exported_count = 0
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CACHE_EXPORT_FIELDS)
+        for cache_key, entry in cache_store.iter_entries():
+            writer.writerow([
+                cache_key,
+                entry.column_name,
+                entry.original_value,
+                entry.normalized_value,
+                entry.confidence_score,
+                entry.timestamp.isoformat(),
+                entry.approved_by,
+                entry.review_count,
+                entry.last_reviewed.isoformat() if entry.last_reviewed else None,
+                entry.fingerprint
+            ])
+            exported_count += 1
+    
+    if exported_count:
+        print(f"Exported {exported_count} cache entries to {filename}")
     else:
+        os.remove(filename)
         print("No cache entries to export")
 
-def import_cache_from_csv(filename: str):
+CACHE_IMPORT_CHUNK_SIZE = 50000  # CSV rows read and committed per transaction
+
+def _prepare_cache_import_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Validate and transform one chunk of a cache CSV with column-wise operations
+    
+    Args:
+        chunk (pd.DataFrame): Raw rows read from the CSV
+        
+    Returns:
+        tuple: (rows ordered as CacheStore.COLUMNS, number of rows skipped)
+    """
+    for field in CACHE_EXPORT_FIELDS:
+        if field not in chunk.columns:
+            chunk[field] = None
+    
+    chunk['confidence_score'] = pd.to_numeric(chunk['confidence_score'], errors='coerce')
+    chunk['review_count'] = pd.to_numeric(chunk['review_count'], errors='coerce').fillna(0).astype(int)
+    timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce', format='ISO8601')
+    last_reviewed = pd.to_datetime(chunk['last_reviewed'], errors='coerce', format='ISO8601')
+    
+    # Fill in keys for rows exported before cache_key was part of the CSV
+    missing_key = chunk['cache_key'].isna() & chunk['original_value'].notna() & chunk['column_name'].notna()
+    if missing_key.any():
+        chunk.loc[missing_key, 'cache_key'] = [
+            get_cache_key(str(value), str(column))
+            for value, column in zip(chunk.loc[missing_key, 'original_value'], chunk.loc[missing_key, 'column_name'])
+        ]
+    
+    valid = (
+        chunk['cache_key'].notna()
+        & chunk['normalized_value'].notna()
+        & chunk['confidence_score'].between(0, 1)
+        & timestamps.notna()
+    )
+    chunk = chunk[valid].copy()
+    # Epoch seconds, matching cache_store.to_epoch
+    chunk['timestamp'] = (timestamps[valid] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+    chunk['last_reviewed'] = (last_reviewed[valid] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+    
+    rows = chunk[CACHE_EXPORT_FIELDS].astype(object)
+    return rows.where(rows.notna(), None), int((~valid).sum())
+
+def import_cache_from_csv(filename: str, chunk_size: int = CACHE_IMPORT_CHUNK_SIZE):
     """
     Import cache entries from a CSV file
+    
+    The CSV is read in chunks of chunk_size rows, validated column-wise and
+    committed to the cache store one transaction per chunk, so memory stays
+    bounded however large the snapshot is.
     """
     try:
-        df = pd.read_csv(filename)
         imported_count = 0
+        skipped_count = 0
+        start_time = time.time()
         
-        for _, row in df.iterrows():
-            cache_key = get_cache_key(row['original_value'], row['column_name'])
-            entry = CacheEntry(
-                normalized_value=row['normalized_value'],
-                confidence_score=float(row['confidence_score']),
-                timestamp=datetime.fromisoformat(row['timestamp'])
-            )
-            entry.approved_by = row['approved_by']
-            entry.review_count = int(row['review_count'])
-            if pd.notna(row['last_reviewed']):
-                entry.last_reviewed = datetime.fromisoformat(row['last_reviewed'])
-            
-            cache_file = CACHE_DIR / f"{cache_key}.pkl"
-            with open(cache_file, 'wb') as f:
-                pickle.dump(entry.to_dict(), f)
-            imported_count += 1
+        for chunk_number, chunk in enumerate(pd.read_csv(filename, chunksize=chunk_size, dtype=str), 1):
+            rows, skipped = _prepare_cache_import_chunk(chunk)
+            imported_count += cache_store.put_rows(rows.itertuples(index=False, name=None))
+            skipped_count += skipped
+            elapsed = time.time() - start_time
+            print(f"  Chunk {chunk_number}: {imported_count} imported, {skipped_count} skipped "
+                  f"({imported_count / elapsed if elapsed else 0:.0f} rows/s)")
         
+        if skipped_count:
+            logging.warning(f"Skipped {skipped_count} invalid rows while importing {filename}")
         print(f"Imported {imported_count} cache entries from {filename}")
     except Exception as e:
         logging.error(f"Error importing cache from {filename}: {e}")
         print(f"Error importing cache: {e}")
 
+def rekey_cache_entries(batch_size: int = 1000):
+    """
+    Move entries whose stored original value now maps to a different cache key
+    
+    Entries without an original value (migrated from .pkl files) cannot be
+    re-keyed and are left under their legacy keys. When several entries map to
+    the same key, or one is already stored there, the approved or newest one
+    is kept (see entry_precedence) and the others are dropped.
+    """
+    rekeyed_count = 0
+    batch = []
+    
+    def flush():
+        winners = {}
+        for _, new_key, entry in batch:
+            if new_key not in winners or entry_precedence(entry) > entry_precedence(winners[new_key]):
+                winners[new_key] = entry
+        for new_key, entry in list(winners.items()):
+            existing = cache_store.get(new_key)
+            if existing and entry_precedence(existing) >= entry_precedence(entry):
+                del winners[new_key]
+        cache_store.put_many(winners.items())
+        cache_store.delete_many(old_key for old_key, _, _ in batch)
+    
+    # Re-keyed rows get new rowids and are skipped when the scan reaches them
+    for cache_key, entry in cache_store.iter_entries():
+        if entry.original_value is None or entry.column_name is None:
+            continue
+        new_key = get_cache_key(entry.original_value, entry.column_name)
+        if new_key == cache_key:
+            continue
+        batch.append((cache_key, new_key, entry))
+        if len(batch) >= batch_size:
+            flush()
+            rekeyed_count += len(batch)
+            batch = []
+    if batch:
+        flush()
+        rekeyed_count += len(batch)
+    
+    print(f"Re-keyed {rekeyed_count} cache entries")
+    return rekeyed_count
+
+def revalidate_outdated_entries():
+    """
+    Queue every entry from an incompatible prompt/model version for background refresh
+    """
+    counts = cache_store.fingerprint_counts()
+    print("\nEntries by prompt/model version:")
+    for fingerprint, count in counts.items():
+        label = fingerprint or 'unversioned'
+        current = " (current)" if fingerprint in CURRENT_NORMALIZATION_FINGERPRINTS else ""
+        print(f"  {label}{current}: {count}")
+    
+    queued = 0
+    for fingerprint in counts:
+        for cache_key, entry in cache_store.query(fingerprint=fingerprint):
+            if not is_compatible_entry(entry) and cache_revalidator.enqueue(cache_key):
+                queued += 1
+    
+    if not queued:
+        print("No outdated entries to revalidate.")
+        return
+    print(f"Queued {queued} entries for revalidation. They are refreshed in the background.")
+    if input("Wait for revalidation to finish? (y/n): ").lower() == 'y':
+        cache_revalidator.wait()
+        print(f"Revalidated {cache_revalidator.refreshed} entries ({cache_revalidator.failed} failed).")
+
+def migrate_legacy_cache():
+    """
+    Import legacy .pkl cache files from CACHE_DIR into the cache store
+    """
+    remove_files = input("Delete .pkl files after importing them? (y/n): ").lower() == 'y'
+    imported_count = migrate_pickle_cache(cache_store, CACHE_DIR, remove_files=remove_files)
+    print(f"Migrated {imported_count} legacy cache entries into {CACHE_DB_PATH}")
+
 def bulk_edit_cache_entries():
     """
     Bulk edit cache entries based on patterns
@@ -1033,35 +1786,21 @@ def bulk_edit_cache_entries():
     if choice == '5':
         return
     
-    entries = []
-    for cache_file in CACHE_DIR.glob('*.pkl'):
-        try:
-            with open(cache_file, 'rb') as f:
-                entry = CacheEntry.from_dict(pickle.load(f))
-                key_parts = cache_file.stem.split(':')
-                entries.append((cache_file, key_parts[0], key_parts[1], entry))
-        except Exception as e:
-            logging.warning(f"Error reading cache file {cache_file}: {e}")
-    
-    if not entries:
-        print("No cache entries found.")
-        return
-    
     filtered_entries = []
     if choice == '1':
         column = input("Enter column name to edit: ")
-        filtered_entries = [(f, c, o, e) for f, c, o, e in entries if c == column]
+        filtered_entries = list(cache_store.query(column_name=column))
     elif choice == '2':
         min_score = float(input("Enter minimum confidence score: "))
         max_score = float(input("Enter maximum confidence score: "))
-        filtered_entries = [(f, c, o, e) for f, c, o, e in entries if min_score <= e.confidence_score <= max_score]
+        filtered_entries = list(cache_store.query(min_confidence=min_score, max_confidence=max_score))
     elif choice == '3':
         status = input("Enter approval status (auto_approved/user_approved/manual_review): ")
-        filtered_entries = [(f, c, o, e) for f, c, o, e in entries if e.approved_by == status]
+        filtered_entries = list(cache_store.query(approved_by=status))
     elif choice == '4':
         start_date = datetime.fromisoformat(input("Enter start date (YYYY-MM-DD): "))
         end_date = datetime.fromisoformat(input("Enter end date (YYYY-MM-DD): "))
-        filtered_entries = [(f, c, o, e) for f, c, o, e in entries if start_date <= e.timestamp <= end_date]
+        filtered_entries = list(cache_store.query(start_date=start_date, end_date=end_date))
     
     if not filtered_entries:
         print("No entries match the criteria.")
@@ -1078,70 +1817,310 @@ def bulk_edit_cache_entries():
     
     if edit_choice == '1':
         new_value = input("Enter new normalized value: ")
-        for cache_file, _, _, entry in filtered_entries:
+        for _, entry in filtered_entries:
             entry.normalized_value = new_value
             entry.review_count += 1
             entry.last_reviewed = datetime.now()
             entry.approved_by = "bulk_edit"
-            with open(cache_file, 'wb') as f:
-                pickle.dump(entry.to_dict(), f)
+        cache_store.put_many(filtered_entries)
     elif edit_choice == '2':
         new_score = float(input("Enter new confidence score: "))
-        for cache_file, _, _, entry in filtered_entries:
+        for _, entry in filtered_entries:
             entry.confidence_score = new_score
             entry.review_count += 1
             entry.last_reviewed = datetime.now()
             entry.approved_by = "bulk_edit"
-            with open(cache_file, 'wb') as f:
-                pickle.dump(entry.to_dict(), f)
+        cache_store.put_many(filtered_entries)
     elif edit_choice == '3':
         new_status = input("Enter new approval status: ")
-        for cache_file, _, _, entry in filtered_entries:
+        for _, entry in filtered_entries:
             entry.approved_by = new_status
             entry.review_count += 1
             entry.last_reviewed = datetime.now()
-            with open(cache_file, 'wb') as f:
-                pickle.dump(entry.to_dict(), f)
+        cache_store.put_many(filtered_entries)
     elif edit_choice == '4':
         confirm = input(f"Are you sure you want to delete {len(filtered_entries)} entries? (y/n): ")
         if confirm.lower() == 'y':
-            for cache_file, _, _, _ in filtered_entries:
-                cache_file.unlink()
+            cache_store.delete_many(key for key, _ in filtered_entries)
             print(f"Deleted {len(filtered_entries)} entries.")
 
-def process_all_files():
+def list_analysis_files(script_dir) -> List[str]:
+    """
+    Names of the demographic analysis files in a directory, in a stable order
+    """
+    return sorted(f for f in os.listdir(script_dir) if f.startswith('demographic_analysis_') and f.endswith('.txt'))
+
+def pending_analysis_files(script_dir, files: List[str]) -> Dict[str, tuple]:
+    """
+    The given analysis files that are new or changed since they were last processed
+    
+    Files whose manifest entry still matches and has a final status are left
+    out, checked by their size and mtime without reading them.
+    
+    Returns:
+        dict: File name -> signature to record its outcome with, in the order of files
+    """
+    pending = file_manifest.pending([os.path.join(script_dir, file) for file in files])
+    skipped = len(files) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} unchanged file(s) that were already processed.")
+    return {os.path.basename(filepath): signature for filepath, signature in pending.items()}
+
+def saved_status(row_id) -> str:
+    """
+    Manifest status of a file whose SQL was saved, depending on whether it was also loaded
+    """
+    return LOADED if row_id is not None else SAVED
+
+def prepare_records(records, with_sql: bool = False):
+    """
+    Normalize reports one at a time, and generate their SQL if with_sql
+    
+    Yields:
+        Per report, (normalized data, SQL or None), or the InvalidRecordError it was rejected with
+    """
+    for data in records:
+        try:
+            normalized_data = normalize_data(data)
+        except InvalidRecordError as e:
+            yield e
+            continue
+        yield normalized_data, generate_sql(normalized_data) if with_sql else None
+
+def confirm_duplicate(label) -> bool:
+    """
+    Ask whether to skip a report that duplicates an existing record
+    """
+    print(f"\nWarning: {label} appears to be a duplicate of an existing record.")
+    proceed = input("Do you want to proceed with generating the SQL anyway? (y/n): ")
+    if proceed.lower() != 'y':
+        print(f"Skipping {label}...")
+        return True
+    return False
+
+def skip_duplicate(label) -> bool:
+    """
+    Skip a report that duplicates an existing record without asking
+    """
+    print(f"Skipping {label}: appears to be a duplicate.")
+    return True
+
+def load_reports(file, filepath, prepared, skip_duplicate_report) -> Outcome:
+    """
+    Check and insert the prepared reports of one file, one row per report, in order
+    
+    Reports are consumed one at a time, so a file holding any number of them is
+    loaded in constant memory.
+    
+    Args:
+        file (str): File name, used in messages
+        filepath (str): Path to the file
+        prepared (iterable): prepare_records output for the file's reports
+        skip_duplicate_report (callable): Takes a report's label and returns whether to skip
+            it as a duplicate, e.g. confirm_duplicate
+        
+    Returns:
+        tuple: (status, first row id, error) of the file, see combine_outcomes
+        
+    Raises:
+        ValueError: If the file holds no report
+    """
+    prepared = iter(prepared)
+    first = next(prepared, None)
+    if first is None:
+        raise ValueError(f"No demographic analysis report found in {filepath}")
+    second = next(prepared, None)
+    several = second is not None
+    outcomes = []
+    for index, result in enumerate(chain([first], [second] if several else [], prepared), 1):
+        label = f"{file} (report {index})" if several else file
+        if isinstance(result, InvalidRecordError):
+            print(f"Rejected {label}: {result}")
+            outcomes.append((REJECTED, None, str(result)))
+            continue
+        normalized_data, sql_content = result
+        if check_duplicate_data(normalized_data) and skip_duplicate_report(label):
+            outcomes.append((DUPLICATE, None, None))
+            continue
+        if sql_content is None:
+            print("Generating SQL...")
+            sql_content = generate_sql(normalized_data)
+        sql_filepath, row_id = save_sql(sql_content, filepath, report=index if several else None)
+        print(f"SQL statements saved to: {sql_filepath}")
+        outcomes.append((saved_status(row_id), row_id, None))
+    return combine_outcomes(outcomes)
+
+def init_file_worker(workers: int):
+    """
+    Set up a file-processing worker process with its own database connection and LLM client
+    
+    Args:
+        workers (int): Number of workers in the pool, which split the LLM rate limits
+    """
+    global worker_connection
+    set_gateway_share(1 / workers)
+    conn = get_db_connection()
+    if conn:
+        conn.autocommit = True
+        worker_connection = WorkerConnection(conn)
+
+def prepare_chunk(records: List[dict]) -> list:
+    """
+    Normalize a chunk of reports and generate their SQL, in a worker process
+    
+    Returns:
+        list: See prepare_records
+    """
+    return list(prepare_records(records, with_sql=True))
+
+def iter_file_chunks(script_dir, files):
+    """
+    (file name, chunk) pairs with the reports of each file PREPARE_CHUNK_SIZE at a time
+    
+    Every file yields at least one chunk, empty if it holds no report; a file that
+    fails to parse yields the reports before the error, then the exception.
+    """
+    for file in files:
+        chunk = []
+        try:
+            for data in iter_demographic_records(os.path.join(script_dir, file)):
+                chunk.append(data)
+                if len(chunk) == PREPARE_CHUNK_SIZE:
+                    yield file, chunk
+                    chunk = []
+        except Exception as e:
+            if chunk:
+                yield file, chunk
+            yield file, e
+            continue
+        yield file, chunk
+
+def process_files_in_parallel(script_dir, pending: Dict[str, tuple], workers: int) -> List[Tuple[str, str]]:
+    """
+    Prepare files on a process pool and load them into the table in file order
+    
+    Files are parsed in this process and sent to the workers PREPARE_CHUNK_SIZE
+    reports at a time, with at most two chunks per worker in flight, so files of
+    any size are processed in bounded memory. Each worker normalizes and
+    generates the SQL of one chunk at a time, with its own database connection
+    and LLM client; values were normalized up front by prefetch_normalizations,
+    so workers mostly read them from the shared cache, as a serial run does.
+    Duplicate checks and inserts run in this process, one report at a time in
+    file order, so each report is checked against the rows before it and the
+    table ends up as after a serial run. Nothing is asked interactively:
+    duplicates are skipped, and errors are collected and reported once all
+    files are done.
+    
+    Args:
+        script_dir (str): Directory of the files
+        pending (dict): File name -> manifest signature, see pending_analysis_files
+        workers (int): Number of worker processes
+        
+    Returns:
+        list: (file name, error message) of each file that failed
+    """
+    errors = []
+    statuses = defaultdict(int)
+    # The workers actually started split the rate limits, not the number asked for
+    pool_size = min(workers, len(pending))
+    # Spawned workers start clean rather than inheriting this process's connections and threads
+    with ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_file_worker, initargs=(pool_size,)) as executor:
+        chunks = iter_file_chunks(script_dir, pending)
+        in_flight = deque()  # (file name, future, or empty chunk or parse error) in file order
+        
+        def submit_next():
+            for file, chunk in islice(chunks, 1):
+                if isinstance(chunk, list) and chunk:
+                    chunk = executor.submit(prepare_chunk, chunk)
+                in_flight.append((file, chunk))
+        
+        def next_task(file):
+            # The next task of a file, if any, topping up the tasks in flight
+            if not in_flight or in_flight[0][0] != file:
+                return None
+            _, task = in_flight.popleft()
+            submit_next()
+            return task
+        
+        def prepared_reports(file):
+            task = next_task(file)
+            while task is not None:
+                if isinstance(task, Exception):
+                    raise task
+                yield from task.result() if isinstance(task, Future) else task
+                task = next_task(file)
+        
+        for _ in range(2 * pool_size):
+            submit_next()
+        for file, signature in pending.items():
+            filepath = os.path.join(script_dir, file)
+            try:
+                print(f"\nLoading {file}...")
+                status, row_id, error = load_reports(file, filepath, prepared_reports(file), skip_duplicate)
+                file_manifest.record(filepath, signature, status, row_id=row_id, error=error)
+            except Exception as e:
+                logging.error(f"Error processing {file}: {e}")
+                status = FAILED
+                file_manifest.record(filepath, signature, status, error=str(e))
+                errors.append((file, str(e)))
+            # Drop the chunks of a file that failed part way
+            task = next_task(file)
+            while task is not None:
+                if isinstance(task, Future):
+                    task.cancel()
+                task = next_task(file)
+            statuses[status] += 1
+    
+    print(f"\nProcessed {len(pending)} files: " + ", ".join(f"{count} {status}" for status, count in statuses.items()))
+    if errors:
+        print(f"{len(errors)} file(s) failed:")
+        for file, error in errors:
+            print(f"  {file}: {error}")
+    return errors
+
+def process_all_files(workers: int = FILE_PROCESSING_WORKERS):
     """
-    Process all demographic analysis files in the directory
+    Process all new or changed demographic analysis files in the directory
+    
+    Args:
+        workers (int): Worker processes to prepare files with; 1 processes them
+            one at a time, asking how to handle duplicates and errors
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    analysis_files = [f for f in os.listdir(script_dir) if f.startswith('demographic_analysis_') and f.endswith('.txt')]
+    analysis_files = list_analysis_files(script_dir)
     
     if not analysis_files:
         print("No demographic analysis files found.")
         return
     
-    print(f"\nProcessing all {len(analysis_files)} files...")
+    pending = pending_analysis_files(script_dir, analysis_files)
+    if not pending:
+        print("All files are up to date.")
+        return
+    
+    print(f"\nProcessing {len(pending)} of {len(analysis_files)} files...")
+    
+    # Normalize the values of all files up front so they share GPT requests
+    prefetch_normalizations(iter_analysis_records(os.path.join(script_dir, file) for file in pending))
+    
+    if workers > 1:
+        process_files_in_parallel(script_dir, pending, workers)
+        return
     
-    for file in analysis_files:
+    for file, signature in pending.items():
         print(f"\nProcessing {file}...")
         filepath = os.path.join(script_dir, file)
         
         try:
-            data = read_demographic_file(filepath)
-            normalized_data = normalize_data(data)
-            
-            if check_duplicate_data(normalized_data):
-                print(f"Warning: {file} appears to be a duplicate.")
-                if input("Skip this file? (y/n): ").lower() == 'y':
-                    continue
-            
-            sql_content = generate_sql(normalized_data)
-            sql_filepath = save_sql(sql_content, filepath)
-            print(f"SQL statements saved to: {sql_filepath}")
+            prepared = prepare_records(iter_demographic_records(filepath))
+            status, row_id, error = load_reports(file, filepath, prepared, confirm_duplicate)
+            file_manifest.record(filepath, signature, status, row_id=row_id, error=error)
             
         except Exception as e:
             logging.error(f"Error processing {file}: {e}")
             print(f"Error processing {file}: {e}")
+            file_manifest.record(filepath, signature, FAILED, error=str(e))
             if input("Continue with next file? (y/n): ").lower() != 'y':
                 break
 
@@ -1155,12 +2134,55 @@ def show_normalization_stats():
     print("=" * 50)
     print(f"Total Normalizations: {summary['total_normalizations']}")
     print(f"Cache Hits: {summary['cache_hits']}")
+    print(f"Local Matches: {summary['local_hits']}")
+    print(f"Negative Cache Hits: {summary['negative_cache_hits']}")
+    print(f"Coalesced Requests: {summary['coalesced_hits']}")
+    print(f"Rejected Records: {summary['rejected_records']}")
+    print(f"Gazetteer Locations: {summary['gazetteer_hits']}")
+    print(f"Location/ZIP Mismatches: {summary['location_mismatches']}")
+    print(f"Locations Validated by ZIP State: {summary['location_validations']}")
     print(f"GPT Calls: {summary['gpt_calls']}")
+    print(f"GPT Failures: {summary['gpt_failures']}")
     print(f"Auto Approvals: {summary['auto_approvals']}")
     print(f"Manual Approvals: {summary['manual_approvals']}")
     print(f"Rejections: {summary['rejections']}")
     print(f"Duration: {summary['duration_seconds']:.2f} seconds")
     
+    memory_stats = memory_cache.get_stats()
+    print("\nMemory Cache:")
+    print("=" * 50)
+    print(f"Entries: {memory_stats['size']} / {memory_stats['max_entries']}")
+    print(f"Hits: {memory_stats['hits']}")
+    print(f"Misses: {memory_stats['misses']}")
+    print(f"Evictions: {memory_stats['evictions']}")
+    print(f"Expirations: {memory_stats['expirations']}")
+    print(f"Hit Rate: {memory_stats['hit_rate']:.2%}")
+    
+    for provider, provider_stats in gateway_stats().items():
+        print(f"\n{provider} Gateway:")
+        print("=" * 50)
+        print(f"Requests: {provider_stats['calls']}")
+        print(f"Retries: {provider_stats['retries']}")
+        print(f"Rate Limited: {provider_stats['rate_limited']}")
+        print(f"Failures: {provider_stats['failures']}")
+        print(f"Concurrency Limit: {provider_stats['concurrency_limit']}")
+    
+    print("\nRouting Tiers:")
+    print("=" * 50)
+    total_cost = 0.0
+    for tier in [LOCAL_TIER] + MODEL_TIERS:
+        tier_stats = tier.get_stats()
+        total_cost += tier_stats['cost']
+        print(f"\n{tier.name}" + (f" ({tier_stats['model']}):" if tier_stats['model'] else ":"))
+        print(f"  Calls: {tier_stats['calls']}")
+        print(f"  Resolved: {tier_stats['resolved']}")
+        print(f"  Escalated: {tier_stats['escalated']}")
+        print(f"  Failures: {tier_stats['failures']}")
+        print(f"  Average Latency: {tier_stats['avg_latency_seconds'] * 1000:.1f} ms")
+        print(f"  Tokens: {tier_stats['prompt_tokens']} prompt, {tier_stats['completion_tokens']} completion")
+        print(f"  Cost: ${tier_stats['cost']:.4f}")
+    print(f"\nTotal Model Cost: ${total_cost:.4f}")
+    
     print("\nColumn Statistics:")
     print("=" * 50)
     for column, col_stats in summary['columns'].items():
@@ -1176,6 +2198,9 @@ def main():
     """
     print("Demographic Analysis to SQL Converter\n" + "="*40)
     
+    if CACHE_SWEEPER_ENABLED:
+        cache_sweeper.start()
+    
     while True:
         print("\nMenu:")
         print("1. Process a single file")
@@ -1193,26 +2218,32 @@ def main():
         elif choice == '2':
             process_multiple_files()
         elif choice == '3':
-            process_all_files()
+            workers = input(f"Worker processes (default {FILE_PROCESSING_WORKERS}): ")
+            process_all_files(int(workers) if workers.strip().isdigit() else FILE_PROCESSING_WORKERS)
         elif choice == '4':
             review_cache_entries()
         elif choice == '5':
             print("\nExport/Import Menu:")
             print("1. Export cache to CSV")
             print("2. Import cache from CSV")
-            subchoice = input("Enter your choice (1-2): ")
+            print("3. Migrate legacy .pkl cache files")
+            subchoice = input("Enter your choice (1-3): ")
             if subchoice == '1':
                 filename = input("Enter export filename (default: cache_export.csv): ") or 'cache_export.csv'
                 export_cache_to_csv(filename)
             elif subchoice == '2':
                 filename = input("Enter import filename: ")
                 import_cache_from_csv(filename)
+            elif subchoice == '3':
+                migrate_legacy_cache()
         elif choice == '6':
             show_normalization_stats()
         elif choice == '7':
             break
         else:
             print("Invalid choice.")
+    
+    cache_sweeper.stop()
 
 def process_single_file():
     """
@@ -1265,7 +2296,7 @@ def process_single_file():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
     # List all demographic analysis files
-    analysis_files = [f for f in os.listdir(script_dir) if f.startswith('demographic_analysis_') and f.endswith('.txt')]
+    analysis_files = list_analysis_files(script_dir)
     
     if not analysis_files:
         print("No demographic analysis files found in the backend directory.")
@@ -1273,7 +2304,8 @@ def process_single_file():
     
     print("\nAvailable files:")
     for i, file in enumerate(analysis_files, 1):
-        print(f"{i}. {file}")
+        entry = file_manifest.get(os.path.join(script_dir, file))
+        print(f"{i}. {file}" + (f" [{entry.status}]" if entry else ""))
     
     # Let user choose a file
     choice = int(input("\nEnter the number of the file to convert: ")) - 1
@@ -1283,31 +2315,30 @@ def process_single_file():
     
     filepath = os.path.join(script_dir, analysis_files[choice])
     
-    print(f"\nProcessing {analysis_files[choice]}...")
-    
-    # Read and parse the file
-    data = read_demographic_file(filepath)
-    
-    # Normalize the data
-    print("Normalizing data...")
-    normalized_data = normalize_data(data)
-    
-    # Check for duplicates
-    if check_duplicate_data(normalized_data):
-        print("\nWarning: This data appears to be a duplicate of an existing record.")
-        proceed = input("Do you want to proceed with generating the SQL anyway? (y/n): ")
-        if proceed.lower() != 'y':
+    # Confirm before reprocessing a file that has not changed since it was processed
+    signature = file_manifest.check(filepath)
+    if signature is None:
+        entry = file_manifest.get(filepath)
+        print(f"\n{analysis_files[choice]} is unchanged since it was processed ({entry.status}).")
+        if input("Process it again? (y/n): ").lower() != 'y':
             print("Operation cancelled.")
             return
+        signature = stat_signature(filepath)
     
-    # Generate SQL
-    print("Generating SQL...")
-    sql_content = generate_sql(normalized_data)
-    
-    # Save SQL to file
-    sql_filepath = save_sql(sql_content, filepath)
+    print(f"\nProcessing {analysis_files[choice]}...")
     
-    print(f"\nSQL statements saved to: {sql_filepath}")
+    try:
+        # Read, parse and normalize the file's reports one at a time
+        print("Normalizing data...")
+        prepared = prepare_records(iter_demographic_records(filepath))
+        
+        # Check for duplicates, generate and save the SQL of each report
+        status, row_id, error = load_reports(analysis_files[choice], filepath, prepared, confirm_duplicate)
+        file_manifest.record(filepath, signature, status, row_id=row_id, error=error)
+    except Exception as e:
+        logging.error(f"Error processing {analysis_files[choice]}: {e}")
+        print(f"Error processing {analysis_files[choice]}: {e}")
+        file_manifest.record(filepath, signature, FAILED, error=str(e))
 
 def process_multiple_files():
     """
@@ -1322,7 +2353,7 @@ def process_multiple_files():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
     # List all demographic analysis files
-    analysis_files = [f for f in os.listdir(script_dir) if f.startswith('demographic_analysis_') and f.endswith('.txt')]
+    analysis_files = list_analysis_files(script_dir)
     
     if not analysis_files:
         print("No demographic analysis files found in the backend directory.")
@@ -1330,7 +2361,8 @@ def process_multiple_files():
     
     print("\nAvailable files:")
     for i, file in enumerate(analysis_files, 1):
-        print(f"{i}. {file}")
+        entry = file_manifest.get(os.path.join(script_dir, file))
+        print(f"{i}. {file}" + (f" [{entry.status}]" if entry else ""))
     
     # Let user choose files
     choices = input("\nEnter the numbers of the files to process (comma-separated): ")
@@ -1345,35 +2377,32 @@ def process_multiple_files():
         print("No valid files selected.")
         return
     
-    print(f"\nProcessing {len(selected_files)} files...")
+    pending = pending_analysis_files(script_dir, selected_files)
+    if not pending:
+        print("All selected files are up to date.")
+        return
+    
+    print(f"\nProcessing {len(pending)} files...")
     
-    for file in selected_files:
+    # Normalize the values of all selected files up front so they share GPT requests
+    prefetch_normalizations(iter_analysis_records(os.path.join(script_dir, file) for file in pending))
+    
+    for file, signature in pending.items():
         print(f"\nProcessing {file}...")
         filepath = os.path.join(script_dir, file)
         
-        # Read and parse the file
-        data = read_demographic_file(filepath)
-        
-        # Normalize the data
-        print("Normalizing data...")
-        normalized_data = normalize_data(data)
-        
-        # Check for duplicates
-        if check_duplicate_data(normalized_data):
-            print(f"\nWarning: {file} appears to be a duplicate of an existing record.")
-            proceed = input("Do you want to proceed with generating the SQL anyway? (y/n): ")
-            if proceed.lower() != 'y':
-                print(f"Skipping {file}...")
-                continue
-        
-        # Generate SQL
-        print("Generating SQL...")
-        sql_content = generate_sql(normalized_data)
-        
-        # Save SQL to file
-        sql_filepath = save_sql(sql_content, filepath)
-        
-        print(f"SQL statements saved to: {sql_filepath}")
+        try:
+            # Read, parse and normalize the file's reports one at a time
+            print("Normalizing data...")
+            prepared = prepare_records(iter_demographic_records(filepath))
+            
+            # Check for duplicates, generate and save the SQL of each report
+            status, row_id, error = load_reports(file, filepath, prepared, confirm_duplicate)
+            file_manifest.record(filepath, signature, status, row_id=row_id, error=error)
+        except Exception as e:
+            logging.error(f"Error processing {file}: {e}")
+            print(f"Error processing {file}: {e}")
+            file_manifest.record(filepath, signature, FAILED, error=str(e))
 
 def review_cache_entries():
     """
@@ -1384,9 +2413,11 @@ def review_cache_entries():
     print("2. Review specific entry")
     print("3. Delete specific entry")
     print("4. Clean up expired entries")
-    print("5. Exit")
+    print("5. Re-key entries to the current key version")
+    print("6. Revalidate entries from older prompt/model versions")
+    print("7. Exit")
     
-    choice = input("\nEnter your choice (1-5): ")
+    choice = input("\nEnter your choice (1-7): ")
     
     if choice == '1':
         list_cache_entries()
@@ -1398,6 +2429,10 @@ def review_cache_entries():
         cleanup_expired_cache()
         print("Expired entries cleaned up.")
     elif choice == '5':
+        rekey_cache_entries()
+    elif choice == '6':
+        revalidate_outdated_entries()
+    elif choice == '7':
         return
     else:
         print("Invalid choice.")
@@ -1406,14 +2441,7 @@ def list_cache_entries():
     """
     List all cached entries with their details
     """
-    entries = []
-    for cache_file in CACHE_DIR.glob('*.pkl'):
-        try:
-            with open(cache_file, 'rb') as f:
-                entry = CacheEntry.from_dict(pickle.load(f))
-                entries.append((cache_file.stem, entry))
-        except Exception as e:
-            logging.warning(f"Error reading cache file {cache_file}: {e}")
+    entries = list(cache_store.iter_entries())
     
     if not entries:
         print("No cached entries found.")
@@ -1422,11 +2450,16 @@ def list_cache_entries():
     print("\nCached Entries:")
     for i, (key, entry) in enumerate(entries, 1):
         print(f"\n{i}. Key: {key}")
+        if entry.column_name:
+            print(f"   Column: {entry.column_name}")
+        if entry.original_value:
+            print(f"   Original Value: {entry.original_value}")
         print(f"   Normalized Value: {entry.normalized_value}")
         print(f"   Confidence Score: {entry.confidence_score:.2f}")
         print(f"   Created: {entry.timestamp}")
         print(f"   Approved By: {entry.approved_by or 'None'}")
         print(f"   Review Count: {entry.review_count}")
+        print(f"   Prompt Version: {entry.fingerprint or 'unversioned'}")
         if entry.last_reviewed:
             print(f"   Last Reviewed: {entry.last_reviewed}")
 
@@ -1435,15 +2468,12 @@ def review_specific_entry():
     Review and modify a specific cache entry
     """
     key = input("\nEnter the cache key to review: ")
-    cache_file = CACHE_DIR / f"{key}.pkl"
-    
-    if not cache_file.exists():
-        print("Entry not found.")
-        return
     
     try:
-        with open(cache_file, 'rb') as f:
-            entry = CacheEntry.from_dict(pickle.load(f))
+        entry = cache_store.get(key)
+        if not entry:
+            print("Entry not found.")
+            return
             
         print(f"\nCurrent Entry:")
         print(f"Normalized Value: {entry.normalized_value}")
@@ -1458,8 +2488,7 @@ def review_specific_entry():
             entry.last_reviewed = datetime.now()
             entry.approved_by = "manual_review"
             
-            with open(cache_file, 'wb') as f:
-                pickle.dump(entry.to_dict(), f)
+            cache_store.put(key, entry)
             print("Entry updated.")
     except Exception as e:
         logging.error(f"Error reviewing cache entry: {e}")
@@ -1470,16 +2499,15 @@ def delete_specific_entry():
     Delete a specific cache entry
     """
     key = input("\nEnter the cache key to delete: ")
-    cache_file = CACHE_DIR / f"{key}.pkl"
     
-    if not cache_file.exists():
+    if not cache_store.get(key):
         print("Entry not found.")
         return
     
     confirm = input(f"Are you sure you want to delete {key}? (y/n): ")
     if confirm.lower() == 'y':
         try:
-            cache_file.unlink()
+            cache_store.delete(key)
             print("Entry deleted.")
         except Exception as e:
             logging.error(f"Error deleting cache entry: {e}")